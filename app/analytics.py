@@ -0,0 +1,255 @@
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from grading import NO_ANSWER, decode_letter
+
+# Pick distributions cover options A-F plus a "no answer" column
+OPTION_COLUMNS = 6
+NO_ANSWER_COLUMN = OPTION_COLUMNS
+
+# Respondent number of anonymous records (e.g. a single graded answer), which
+# count for p-values and picks only. Not to be confused with the respondent
+# *tag* 0 that event_log.NO_RESPONDENT gives the same records; see AnswerLog.ingest
+NO_RESPONDENT = -1
+
+# Thresholds for questions worth a second look
+TOO_EASY = 0.95
+TOO_HARD = 0.25
+MIN_RESPONSES = 20
+
+# Session and learner keys remembered for respondent numbering
+MAX_NAMED_RESPONDENTS = 100_000
+
+
+def _ratio(numerator, denominator):
+    """Elementwise numerator / denominator, NaN where the denominator is 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+class AnswerLog:
+    """
+    Answer records kept as columns: question id, chosen option code and respondent.
+
+    Records are appended in chunks (one per graded request) under a lock and
+    concatenated only when statistics are computed. Correctness isn't
+    stored; it is re-derived from the answer key in force at computation
+    time, so fixing a bad key in the bank fixes its statistics too. At most
+    `max_records` of the newest records are kept.
+    """
+
+    def __init__(self, max_records=2_000_000):
+        self.max_records = max_records
+        self._chunks = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._respondents = {}
+        self._numbers = itertools.count()
+        # Bumped on every append; lets callers tell whether cached results are current
+        self.revision = 0
+
+    def __len__(self):
+        return self._size
+
+    def respondent(self, key):
+        """Small integer for a respondent key (session, learner, ...)"""
+        with self._lock:
+            number = self._respondents.get(key)
+            if number is None:
+                if len(self._respondents) >= MAX_NAMED_RESPONDENTS:
+                    # Forget old keys; a returning respondent just gets a new number
+                    self._respondents.clear()
+                number = self._respondents[key] = next(self._numbers)
+            return number
+
+    def record(self, question_ids, codes, respondent=NO_RESPONDENT):
+        """
+        Append parallel arrays of question ids and option codes (NO_ANSWER
+        for none), for one respondent number or an array of them
+        """
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        if not len(question_ids):
+            return
+        codes = np.asarray(codes, dtype=np.uint8)
+        respondents = np.broadcast_to(np.asarray(respondent, dtype=np.int32), question_ids.shape).copy()
+        with self._lock:
+            self._chunks.append((question_ids, codes, respondents))
+            self._size += len(question_ids)
+            if self._size > 2 * self.max_records:
+                self._compact()
+            self.revision += 1
+
+    def _compact(self):
+        """Merge the chunks into one, keeping the newest max_records records"""
+        if len(self._chunks) > 1 or self._size > self.max_records:
+            merged = tuple(np.concatenate(column)[-self.max_records:] for column in zip(*self._chunks))
+            self._chunks = [merged]
+            self._size = len(merged[0])
+
+    def ingest(self, question_ids, codes, respondent_keys):
+        """
+        Append records in bulk, with a respondent key per record.
+
+        Keys are event-log respondent tags: 0 (event_log.ANONYMOUS) marks an
+        anonymous record and becomes NO_RESPONDENT; any other key gets its
+        own respondent number.
+        """
+        keys, inverse = np.unique(np.asarray(respondent_keys), return_inverse=True)
+        numbers = np.array(
+            [self.respondent(int(key)) if key else NO_RESPONDENT for key in keys], dtype=np.int32
+        )
+        self.record(question_ids, codes, numbers[inverse] if len(keys) else NO_RESPONDENT)
+
+    def columns(self):
+        """(question ids, codes, respondents) arrays over every record kept"""
+        with self._lock:
+            if not self._chunks:
+                return np.zeros(0, np.int64), np.zeros(0, np.uint8), np.zeros(0, np.int32)
+            self._compact()
+            return self._chunks[0]
+
+
+def item_statistics(answer_key, question_ids, codes, respondents):
+    """
+    Per-question statistics over a set of answer records, in bank position order.
+
+    Returns a dict of arrays: responses, p_value (share correct),
+    discrimination (point-biserial correlation between getting the
+    question right and the respondent's score on their other answers) and
+    picks (responses per option A-F plus no answer). Everything is computed
+    with bincounts over the whole bank; there is no per-question loop.
+    """
+    size = len(answer_key.answers)
+    found, positions = answer_key.locate(question_ids)
+    positions, codes, respondents = positions[found], codes[found], respondents[found]
+    correct = (codes == answer_key.answers[positions]) & (codes != NO_ANSWER)
+
+    responses = np.bincount(positions, minlength=size)
+    right = np.bincount(positions, weights=correct, minlength=size)
+    columns = np.where(codes == NO_ANSWER, NO_ANSWER_COLUMN, np.minimum(codes, OPTION_COLUMNS - 1))
+    picks = np.bincount(
+        positions * (OPTION_COLUMNS + 1) + columns, minlength=size * (OPTION_COLUMNS + 1)
+    ).reshape(size, OPTION_COLUMNS + 1)
+
+    # Rest score: the respondent's share correct on their other answers
+    known = respondents != NO_RESPONDENT
+    discrimination = np.full(size, np.nan)
+    if known.any():
+        who = respondents[known]
+        x = correct[known].astype(np.float64)
+        answered = np.bincount(who)[who]
+        scored = np.bincount(who, weights=x)[who]
+        has_rest = answered > 1
+        where = positions[known][has_rest]
+        x = x[has_rest]
+        y = (scored[has_rest] - x) / (answered[has_rest] - 1)
+
+        n = np.bincount(where, minlength=size)
+        sx = np.bincount(where, weights=x, minlength=size)
+        sy = np.bincount(where, weights=y, minlength=size)
+        sxy = np.bincount(where, weights=x * y, minlength=size)
+        sxx = np.bincount(where, weights=x * x, minlength=size)
+        syy = np.bincount(where, weights=y * y, minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+            discrimination = np.where(spread > 0, (n * sxy - sx * sy) / spread, np.nan)
+
+    return {
+        'responses': responses,
+        'p_value': _ratio(right, responses),
+        'discrimination': discrimination,
+        'picks': picks,
+    }
+
+
+def review_flags(answer_key, stats, min_responses=MIN_RESPONSES):
+    """Reasons each question looks too easy, too hard or mis-keyed, by bank position"""
+    responses, p_value, discrimination, picks = (
+        stats['responses'], stats['p_value'], stats['discrimination'], stats['picks']
+    )
+    enough = responses >= min_responses
+    key_column = np.minimum(answer_key.answers, OPTION_COLUMNS - 1)
+    top_pick = picks[:, :OPTION_COLUMNS].argmax(axis=1)
+    # A distractor chosen more often than the key is the classic sign of a wrong key
+    distractor_wins = enough & (answer_key.answers != NO_ANSWER) & (
+        picks[:, :OPTION_COLUMNS].max(axis=1) > picks[np.arange(len(picks)), key_column]
+    )
+    checks = (
+        ('too_easy', enough & (p_value >= TOO_EASY)),
+        ('too_hard', enough & (p_value <= TOO_HARD)),
+        ('negative_discrimination', enough & (discrimination < 0)),
+        ('distractor_beats_key', distractor_wins),
+    )
+    flags = {}
+    for reason, mask in checks:
+        for position in np.flatnonzero(mask):
+            flags.setdefault(int(position), []).append(reason)
+    return flags, top_pick
+
+
+def stats_report(snapshot, log):
+    """JSON-ready per-question statistics for the loaded bank"""
+    answer_key = snapshot.answer_key
+    stats = item_statistics(answer_key, *log.columns())
+    flags, top_pick = review_flags(answer_key, stats)
+
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 4)
+
+    letters = [decode_letter(code) for code in range(OPTION_COLUMNS)]
+    # Ids come from the answer key, so no question has to be decoded
+    positions = np.flatnonzero(stats['responses'])
+    questions = []
+    for position, question_id in zip(positions.tolist(), answer_key.ids_at(positions)):
+        responses = int(stats['responses'][position])
+        picks = stats['picks'][position]
+        questions.append({
+            'id': int(question_id),
+            'responses': responses,
+            'p_value': number(stats['p_value'][position]),
+            'discrimination': number(stats['discrimination'][position]),
+            'picks': {letter: int(count) for letter, count in zip(letters, picks) if count},
+            'unanswered': int(picks[NO_ANSWER_COLUMN]),
+            'correct_answer': decode_letter(answer_key.answers[position]),
+            'most_picked': letters[top_pick[position]] if picks[:OPTION_COLUMNS].any() else None,
+            'flags': flags.get(position, []),
+        })
+    return {
+        'bank_version': snapshot.version,
+        'records': len(log),
+        'questions_answered': len(questions),
+        'flagged': sum(1 for question in questions if question['flags']),
+        'questions': questions,
+    }
+
+
+class StatsCache:
+    """
+    Keeps the last stats report until the bank or the answer log changes,
+    recomputing at most once every `max_age` seconds while answers stream in.
+    """
+
+    def __init__(self, log, max_age=30.0):
+        self.log = log
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._key = None
+        self._computed_at = 0.0
+        self._report = None
+
+    def get(self, snapshot, build):
+        """The cached value, or build(report) for a fresh one"""
+        key = (snapshot.version, self.log.revision)
+        now = time.monotonic()
+        if self._key == key or (
+            self._key is not None and self._key[0] == key[0] and now - self._computed_at < self.max_age
+        ):
+            return self._report
+        with self._lock:
+            if self._key != key:
+                self._report = build(stats_report(snapshot, self.log))
+                self._key, self._computed_at = key, time.monotonic()
+        return self._report
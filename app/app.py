@@ -1,19 +1,163 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify
 import os
-import json
-import random
+import time
+
+from analytics import AnswerLog, StatsCache
+from event_log import ANONYMOUS, UNKNOWN, EventLog, batch_tag, make_events, replay, respondent_tag
+from grading import NO_ANSWER, decode_letter, encode_letters, is_question_id
+from metrics import SIZE_BUCKETS, Registry
+from pagination import MAX_PAGE_SIZE, PageError, ndjson_headers, page_body, resolve_page
+from question_bank import QuestionBank
+from serialization import EncodedBody, dump_json, iter_chunks, wants_answers
+from sampling import new_seed, sample_body
+from scheduler import Scheduler
+from search_index import IndexCache
+from sessions import SessionStore
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
-# Load questions data
-def load_questions():
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Request and bank metrics, served on /metrics
+metrics = Registry()
+request_latency = metrics.histogram(
+    'qbank_http_request_duration_seconds', 'Time spent handling a request', ('method', 'route', 'status')
+)
+response_size = metrics.histogram(
+    'qbank_http_response_size_bytes', 'Size of non-streamed response bodies', ('route',), SIZE_BUCKETS
+)
+bank_load_duration = metrics.histogram(
+    'qbank_bank_load_duration_seconds', 'Time spent loading a version of the question bank'
+)
+
+# Parse the question bank once at startup; it is re-read only when the file changes
+bank = QuestionBank(
+    os.environ.get('QUESTIONS_PATH', os.path.join(data_dir, 'az104_questions.json')),
+    check_interval=float(os.environ.get('BANK_CHECK_INTERVAL', 1.0)),
+    on_load=bank_load_duration.observe,
+)
+bank.get()
+
+for name, description in (
+    ('hits', 'Bank lookups served from the loaded snapshot'),
+    ('misses', 'Bank lookups that had to load the file'),
+    ('reloads', 'Times a changed bank file replaced the loaded one'),
+    ('errors', 'Bank loads that failed and kept the previous version'),
+):
+    metrics.sampled(f'qbank_bank_cache_{name}_total', description, 'counter', lambda name=name: getattr(bank, name))
+metrics.sampled('qbank_bank_questions', 'Questions in the loaded bank', 'gauge', lambda: bank.stats()['questions'])
+
+# Topic and full-text queries; QUESTIONS_DB names an optional prebuilt database
+search_indexes = IndexCache(os.environ.get('QUESTIONS_DB'))
+
+# Server-side quiz progress; SESSIONS_DB makes it survive eviction and restarts
+session_store = SessionStore(
+    max_sessions=int(os.environ.get('SESSION_LIMIT', 10000)),
+    ttl=float(os.environ.get('SESSION_TTL', 6 * 3600)),
+    db_path=os.environ.get('SESSIONS_DB'),
+)
+
+# Spaced-repetition schedules per learner, in memory only
+scheduler = Scheduler(max_learners=int(os.environ.get('LEARNER_LIMIT', 10000)))
+
+# Graded answers feed per-question difficulty and distractor statistics on /api/stats
+answer_log = AnswerLog(max_records=int(os.environ.get('ANSWER_LOG_RECORDS', 2_000_000)))
+stats_cache = StatsCache(answer_log, max_age=float(os.environ.get('STATS_MAX_AGE', 30.0)))
+
+# Durable write-behind log of answer events, enabled by EVENT_LOG_DIR
+event_log = None
+if os.environ.get('EVENT_LOG_DIR'):
+    # Earlier events are replayed so the statistics survive a restart
+    for events in replay(os.environ['EVENT_LOG_DIR']):
+        answer_log.ingest(events['question_id'], events['answer'], events['respondent'])
+    event_log = EventLog(
+        os.environ['EVENT_LOG_DIR'],
+        segment_bytes=int(os.environ.get('EVENT_SEGMENT_BYTES', 64 << 20)),
+        queue_size=int(os.environ.get('EVENT_QUEUE_SIZE', 10000)),
+        fsync=os.environ.get('EVENT_FSYNC', '1') != '0',
+    )
+
+def record_answers(question_ids, codes, respondent=ANONYMOUS, correct=None):
+    """
+    Feed answers to the statistics and, when enabled, the event log.
+    
+    `respondent` is one tag for every answer or a list with a tag per
+    answer. Returns False, recording nothing, if the event log's queue was
+    full. The grading routes still answer then: the grade is already
+    computed and only its statistics are lost, which is logged and counted
+    in the event log's rejected total.
+    """
+    if event_log is not None and not event_log.submit(make_events(question_ids, codes, correct, respondent)):
+        app.logger.warning('Event log queue full, %d answers not recorded', len(question_ids))
+        return False
+    respondents = respondent if isinstance(respondent, list) else [respondent] * len(question_ids)
+    answer_log.ingest(question_ids, codes, respondents)
+    return True
+
+def send_encoded(body):
+    """Send a pre-serialized EncodedBody, honouring Accept-Encoding and If-None-Match"""
+    encoding = body.negotiate(request.accept_encodings)
+    etag = body.variant_etag(encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        data = body.variant(encoding)
+        if isinstance(data, bytes):
+            response = Response(data, mimetype='application/json')
+        else:
+            # A mapped body is written a slice at a time instead of copied whole
+            response = Response(iter_chunks(data), mimetype='application/json')
+            response.content_length = len(data)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def send_page(snapshot, view):
+    """Paginated /api/questions response driven by offset/page_size or cursor"""
+    page_size = request.args.get('page_size', default=50, type=int)
     try:
-        with open(os.path.join(data_dir, 'az104_questions.json'), 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # If the JSON file doesn't exist yet, return an empty list
-        return []
+        offset = resolve_page(
+            snapshot, page_size, request.args.get('cursor'), request.args.get('offset', default=0, type=int)
+        )
+    except PageError as e:
+        return jsonify({"error": str(e)}), e.status
+    return Response(page_body(snapshot, view, offset, page_size), mimetype='application/json')
+
+def send_sample(snapshot, view, limit, within=None):
+    """Random subset of the bank; the same seed always yields the same quiz"""
+    body, seed = sample_body(
+        snapshot, view, limit, request.args.get('seed'), request.args.get('stratify'), within
+    )
+    response = Response(body, mimetype='application/json')
+    # Echo the seed so the exact exam can be requested again
+    response.headers['X-Quiz-Seed'] = str(seed)
+    return response
+
+def send_ndjson(snapshot, view):
+    """Stream the bank one question per line so clients can render the first one early"""
+    offset = max(request.args.get('offset', default=0, type=int), 0)
+    return Response(view.iter_ndjson(offset), mimetype='application/x-ndjson', headers=ndjson_headers(snapshot, view))
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_metrics(response):
+    """Observe latency and body size per route template (not per URL, to bound label count)"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_latency.observe(time.perf_counter() - start, request.method, route, response.status_code)
+        # Bodies set in one piece carry Content-Length; streamed ones (NDJSON) don't
+        size = response.content_length
+        if size is not None:
+            response_size.observe(size, route)
+    return response
 
 # Routes
 @app.route('/')
@@ -29,25 +173,392 @@ def quiz():
 @app.route('/api/questions')
 def get_questions():
     """API endpoint to get quiz questions"""
-    questions = load_questions()
+    snapshot = bank.get()
+    questions = snapshot.questions
+    view = snapshot.view(wants_answers(request.args))
     
     # Check if we should limit number of questions
     limit = request.args.get('limit', default=None, type=int)
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    # Topic filter is an indexed query; limit then samples within the topic
+    topic = request.args.get('topic')
+    if topic is not None:
+        positions = search_indexes.get(snapshot).topic_positions(topic)
+        if limit and limit < len(positions):
+            return send_sample(snapshot, view, limit, within=positions)
+        return Response(view.select_body(positions), mimetype='application/json')
+    
     if limit and limit < len(questions):
-        questions = random.sample(questions, limit)
+        return send_sample(snapshot, view, limit)
     
-    return jsonify(questions)
+    # Streaming and paginated variants of the full bank
+    wants_ndjson = request.args.get('format') == 'ndjson' or (
+        request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+        == 'application/x-ndjson'
+    )
+    if wants_ndjson:
+        return send_ndjson(snapshot, view)
+    if any(key in request.args for key in ('offset', 'page_size', 'cursor')):
+        return send_page(snapshot, view)
+    
+    return send_encoded(view.all_questions)
 
 @app.route('/api/question/<int:question_id>')
 def get_question(question_id):
     """API endpoint to get a specific question by ID"""
-    questions = load_questions()
-    
-    for question in questions:
-        if question['id'] == question_id:
-            return jsonify(question)
+    body = bank.get().view(wants_answers(request.args)).get_body(question_id)
+    if body is not None:
+        return Response(body, mimetype='application/json')
     
     return jsonify({"error": "Question not found"}), 404
 
+@app.route('/api/search')
+def search_questions():
+    """API endpoint for full-text search over question and option text"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query parameter q"}), 400
+    limit = min(max(request.args.get('limit', default=20, type=int), 1), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', default=0, type=int), 0)
+    
+    snapshot = bank.get()
+    positions = search_indexes.get(snapshot).search(query, limit=limit, offset=offset)
+    return Response(snapshot.view(wants_answers(request.args)).select_body(positions), mimetype='application/json')
+
+@app.route('/api/topics')
+def get_topics():
+    """API endpoint listing topic tags and their question counts"""
+    return jsonify(search_indexes.get(bank.get()).topics())
+
+@app.route('/api/answers', methods=['POST'])
+def check_answers():
+    """
+    API endpoint to grade answers against the bank.
+    
+    Accepts a single {"question_id": 1, "answer": "A"} object or a batch
+    {"answers": [...]} of them, so a whole exam can be graded in one call.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    
+    batch = 'answers' in payload
+    items = payload['answers'] if batch else [payload]
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) and is_question_id(item.get('question_id')) for item in items
+    ):
+        return jsonify({"error": "Each answer needs an integer question_id"}), 400
+    
+    question_ids = [item['question_id'] for item in items]
+    selected = [item.get('answer') for item in items]
+    found, correct, correct_codes = bank.get().answer_key.grade(question_ids, selected)
+    codes = encode_letters(selected)
+    # Lookups without an answer (e.g. the review screen fetching the key) aren't responses
+    answered = codes != NO_ANSWER
+    if answered.any():
+        # A batch is one exam by one respondent; a lone answer can't be attributed
+        record_answers(
+            [question_id for question_id, is_answered in zip(question_ids, answered) if is_answered],
+            codes[answered], batch_tag() if batch else ANONYMOUS, correct[answered],
+        )
+    
+    results = [
+        {
+            'question_id': question_id,
+            'answer': answer,
+            'correct': bool(is_correct),
+            'correct_answer': decode_letter(code),
+        } if is_found else {'question_id': question_id, 'error': 'Question not found'}
+        for question_id, answer, is_found, is_correct, code
+        in zip(question_ids, selected, found, correct, correct_codes)
+    ]
+    
+    if not batch:
+        if not found[0]:
+            return jsonify(results[0]), 404
+        return jsonify(results[0])
+    return jsonify({'results': results, 'score': int(correct.sum()), 'total': len(results)})
+
+def session_body(session, snapshot):
+    """Everything a client needs to resume a session, graded against the loaded bank"""
+    chosen = session.answer_codes()
+    answered = chosen != NO_ANSWER
+    found, correct_codes = snapshot.answer_key.lookup(session.question_ids)
+    correct = found & answered & (chosen == correct_codes)
+    return {
+        'session_id': session.id,
+        'question_ids': session.question_ids.tolist(),
+        'answers': [decode_letter(code) for code in chosen],
+        # Correct answers are only revealed for questions already answered
+        'correct_answers': [
+            decode_letter(code) if is_answered else None for code, is_answered in zip(correct_codes, answered)
+        ],
+        'flagged': session.flag_mask().tolist(),
+        'current': session.current,
+        'answered': int(answered.sum()),
+        'score': int(correct.sum()),
+        'total': len(session),
+        'created': session.created,
+    }
+
+def find_session(session_id):
+    """(session, None) or (None, error response)"""
+    session = session_store.get(session_id)
+    if session is None:
+        return None, (jsonify({"error": "Session not found or expired"}), 404)
+    return session, None
+
+def session_position(session, payload):
+    """Exam position named by a request body's question_id, or (None, error response)"""
+    if not isinstance(payload, dict) or not is_question_id(payload.get('question_id')):
+        return None, (jsonify({"error": "Expected a JSON object with an integer question_id"}), 400)
+    position = session.position(payload['question_id'])
+    if position is None:
+        return None, (jsonify({"error": "Question is not part of this session"}), 404)
+    return position, None
+
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    """
+    API endpoint to start a quiz session.
+    
+    Takes {"question_ids": [...]} for a fixed exam, or {"limit": n} (with an
+    optional "seed" and "stratify") to sample one; an empty body covers the
+    whole bank in bank order.
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    
+    snapshot = bank.get()
+    question_ids = payload.get('question_ids')
+    seed = None
+    if question_ids is not None:
+        if not isinstance(question_ids, list) or not question_ids or not all(
+            is_question_id(question_id) for question_id in question_ids
+        ):
+            return jsonify({"error": "question_ids must be a non-empty list of integers"}), 400
+        if len(set(question_ids)) != len(question_ids):
+            return jsonify({"error": "question_ids must not repeat"}), 400
+        found, _ = snapshot.answer_key.locate(question_ids)
+        if not found.all():
+            return jsonify({"error": "Unknown question ids", "question_ids": [
+                question_id for question_id, is_found in zip(question_ids, found) if not is_found
+            ]}), 400
+    else:
+        limit = payload.get('limit')
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        if limit and limit < len(snapshot.questions):
+            seed = payload.get('seed')
+            if not isinstance(seed, int) or isinstance(seed, bool) or seed < 0:
+                seed = new_seed()
+            positions = snapshot.sampler.sample(limit, seed=seed, stratify=bool(payload.get('stratify')))
+        else:
+            positions = range(len(snapshot.questions))
+        question_ids = snapshot.answer_key.ids_at(positions)
+    
+    session = session_store.create(question_ids)
+    body = session_body(session, snapshot)
+    if seed is not None:
+        body['seed'] = seed
+    return jsonify(body), 201
+
+@app.route('/api/sessions/<session_id>')
+def get_session(session_id):
+    """API endpoint to resume a session: its questions, answers so far, flags and score"""
+    session, error = find_session(session_id)
+    if error:
+        return error
+    return jsonify(session_body(session, bank.get()))
+
+@app.route('/api/sessions/<session_id>/questions')
+def get_session_questions(session_id):
+    """API endpoint returning a session's questions in exam order, without answers"""
+    session, error = find_session(session_id)
+    if error:
+        return error
+    snapshot = bank.get()
+    found, positions = snapshot.answer_key.locate(session.question_ids)
+    # Questions removed from the bank since the session started are left out
+    return Response(snapshot.view(False).select_body(positions[found]), mimetype='application/json')
+
+@app.route('/api/sessions/<session_id>/answers', methods=['POST'])
+def answer_session_question(session_id):
+    """API endpoint to grade one {"question_id", "answer"} and record it in the session"""
+    session, error = find_session(session_id)
+    if error:
+        return error
+    payload = request.get_json(silent=True)
+    position, error = session_position(session, payload)
+    if error:
+        return error
+    
+    answer = payload.get('answer')
+    found, correct, correct_codes = bank.get().answer_key.grade([payload['question_id']], [answer])
+    if not found[0]:
+        return jsonify({"error": "Question not found"}), 404
+    code = encode_letters([answer])[0]
+    session.set_answer(position, code)
+    record_answers([payload['question_id']], [code], respondent_tag('session:' + session.id), correct)
+    session_store.save(session)
+    
+    chosen = session.answer_codes()
+    return jsonify({
+        'question_id': payload['question_id'],
+        'answer': answer,
+        'correct': bool(correct[0]),
+        'correct_answer': decode_letter(correct_codes[0]),
+        'current': session.current,
+        'answered': int((chosen != NO_ANSWER).sum()),
+    })
+
+@app.route('/api/sessions/<session_id>/flags', methods=['POST'])
+def flag_session_question(session_id):
+    """API endpoint to set or clear a question's review flag: {"question_id", "flagged"}"""
+    session, error = find_session(session_id)
+    if error:
+        return error
+    payload = request.get_json(silent=True)
+    position, error = session_position(session, payload)
+    if error:
+        return error
+    
+    flagged = bool(payload.get('flagged', True))
+    session.set_flag(position, flagged)
+    session_store.save(session)
+    return jsonify({'question_id': payload['question_id'], 'flagged': flagged})
+
+@app.route('/api/sessions/stats')
+def get_session_stats():
+    """API endpoint exposing session store counters"""
+    return jsonify(session_store.stats())
+
+@app.route('/api/learners/stats')
+def get_learner_stats():
+    """API endpoint exposing scheduler counters"""
+    return jsonify(scheduler.stats())
+
+def learner_id(value):
+    """A client-chosen learner id, or None if it is missing or unreasonable"""
+    if not isinstance(value, str) or not 0 < len(value) <= 64:
+        return None
+    return value
+
+@app.route('/api/next')
+def next_question():
+    """
+    API endpoint returning the question a learner should answer next.
+    
+    Due reviews come first (earliest due first), then questions the
+    learner hasn't seen; answers go to POST /api/review.
+    """
+    learner = learner_id(request.args.get('learner'))
+    if learner is None:
+        return jsonify({"error": "Missing or invalid learner parameter"}), 400
+    
+    snapshot = bank.get()
+    picked = scheduler.next_question(learner, snapshot)
+    if picked is None:
+        return jsonify({"error": "No questions available"}), 404
+    question_id, is_due = picked
+    # Answers stay hidden until the learner answers through /api/review
+    body = snapshot.view(False).get_body(question_id)
+    meta = dump_json({'due': is_due, 'learner': learner})
+    # Splice the pre-serialized question into {"question": ..., "due": ..., "learner": ...}
+    return Response(b'{"question":' + body + b',' + meta[1:], mimetype='application/json')
+
+@app.route('/api/review', methods=['POST'])
+def review_question():
+    """API endpoint to grade a learner's {"learner", "question_id", "answer"} and reschedule it"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not is_question_id(payload.get('question_id')):
+        return jsonify({"error": "Expected a JSON object with an integer question_id"}), 400
+    learner = learner_id(payload.get('learner'))
+    if learner is None:
+        return jsonify({"error": "Missing or invalid learner"}), 400
+    
+    question_id = payload['question_id']
+    answer = payload.get('answer')
+    found, correct, correct_codes = bank.get().answer_key.grade([question_id], [answer])
+    if not found[0]:
+        return jsonify({"error": "Question not found"}), 404
+    due = scheduler.review(learner, question_id, bool(correct[0]))
+    record_answers([question_id], encode_letters([answer]), respondent_tag('learner:' + learner), correct)
+    return jsonify({
+        'question_id': question_id,
+        'answer': answer,
+        'correct': bool(correct[0]),
+        'correct_answer': decode_letter(correct_codes[0]),
+        'due_at': due,
+    })
+
+@app.route('/api/stats')
+def get_stats():
+    """API endpoint with per-question p-values, discrimination and option picks"""
+    body = stats_cache.get(bank.get(), lambda report: EncodedBody(dump_json(report)))
+    return send_encoded(body)
+
+@app.route('/api/events', methods=['POST'])
+def ingest_events():
+    """
+    API endpoint accepting answer events for the usage log.
+    
+    Takes one {"question_id": 1, "answer": "A"} event or a batch
+    {"events": [...]}; an event may name its "session" or "learner" and
+    say whether it was "correct". Events are written behind the response,
+    so this answers 202 once they are queued.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    items = payload['events'] if 'events' in payload else [payload]
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) and is_question_id(item.get('question_id')) for item in items
+    ):
+        return jsonify({"error": "Each event needs an integer question_id"}), 400
+    if not items:
+        return jsonify({'accepted': 0}), 202
+    
+    def respondent(item):
+        for field in ('session', 'learner'):
+            if isinstance(item.get(field), str) and item[field]:
+                return respondent_tag(f"{field}:{item[field]}")
+        return ANONYMOUS
+    
+    # One array for the whole request, so it is queued or refused as a unit
+    queued = record_answers(
+        [item['question_id'] for item in items],
+        encode_letters([item.get('answer') for item in items]),
+        [respondent(item) for item in items],
+        [UNKNOWN if item.get('correct') is None else bool(item['correct']) for item in items],
+    )
+    if not queued:
+        response = jsonify({"error": "Event log is busy, retry shortly"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return jsonify({'accepted': len(items), 'logged': event_log is not None}), 202
+
+@app.route('/api/events/stats')
+def get_event_stats():
+    """API endpoint exposing event log queue and writer counters"""
+    if event_log is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(event_log.stats(), enabled=True))
+
+@app.route('/api/bank/stats')
+def get_bank_stats():
+    """API endpoint exposing question bank cache counters"""
+    return jsonify(bank.stats())
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), content_type=metrics.content_type)
+
 if __name__ == '__main__':
     app.run(debug=True)
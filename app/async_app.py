@@ -0,0 +1,189 @@
+"""
+asyncio variant of the question read API, for benchmarking many concurrent
+slow or streaming clients (benchmarks/compare_async.py).
+
+Serves only the /api/questions and /api/question/<id> contract of app.py,
+from the same QuestionBank snapshots and response helpers, but one event
+loop holds every connection, so a client reading an NDJSON stream slowly
+costs a socket rather than a worker thread. It has no UI, sessions,
+grading or statistics, so it isn't one of run.py's SERVER modes; run it
+directly with `python app/async_app.py`. The bank is never loaded on the
+loop: a background task refreshes it in a thread and handlers only ever
+take the already-loaded snapshot.
+"""
+import asyncio
+import logging
+import os
+
+from aiohttp import web
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+
+from pagination import PageError, ndjson_headers, page_body, resolve_page
+from question_bank import QuestionBank
+from sampling import sample_body
+from search_index import IndexCache
+from serialization import wants_answers
+
+data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+logger = logging.getLogger(__name__)
+
+# NDJSON lines sent per write; the write waits while the client's socket buffer is full
+NDJSON_BATCH = 64
+
+
+def int_arg(request, name, default=None):
+    """Integer query parameter, falling back to `default` like Flask's type=int"""
+    try:
+        return int(request.query[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def json_body(body, **kwargs):
+    return web.Response(body=body, content_type='application/json', **kwargs)
+
+
+def json_error(message, status):
+    return web.json_response({"error": message}, status=status)
+
+
+async def send_encoded(request, body):
+    """Send a pre-serialized EncodedBody, honouring Accept-Encoding and If-None-Match"""
+    encoding = body.negotiate(parse_accept_header(request.headers.get('Accept-Encoding')))
+
+    etag = body.variant_etag(encoding)
+    headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+    if parse_etags(request.headers.get('If-None-Match')).contains_weak(etag):
+        return web.Response(status=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        # The first request for an encoding compresses the whole bank; keep that off the loop
+        data = await asyncio.to_thread(body.variant, encoding)
+    else:
+        data = body.variant(None)
+    return json_body(data, headers=headers)
+
+
+def send_sample(request, snapshot, view, limit, within=None):
+    """Random subset of the bank; the same seed always yields the same quiz"""
+    body, seed = sample_body(
+        snapshot, view, limit, request.query.get('seed'), request.query.get('stratify'), within
+    )
+    # Echo the seed so the exact exam can be requested again
+    return json_body(body, headers={'X-Quiz-Seed': str(seed)})
+
+
+async def send_ndjson(request, snapshot, view):
+    """Stream the bank one question per line, yielding to other clients between batches"""
+    offset = max(int_arg(request, 'offset', 0), 0)
+    headers = ndjson_headers(snapshot, view)
+    headers['Content-Type'] = 'application/x-ndjson'
+    response = web.StreamResponse(headers=headers)
+    await response.prepare(request)
+    batch = []
+    for line in view.iter_ndjson(offset):
+        batch.append(line)
+        if len(batch) == NDJSON_BATCH:
+            await response.write(b''.join(batch))
+            batch = []
+    if batch:
+        await response.write(b''.join(batch))
+    await response.write_eof()
+    return response
+
+
+async def get_questions(request):
+    """API endpoint to get quiz questions"""
+    bank = request.app['bank']
+    snapshot = bank.get()
+    view = snapshot.view(wants_answers(request.query))
+
+    # Check if we should limit number of questions
+    limit = int_arg(request, 'limit')
+    if limit is not None and limit < 1:
+        return json_error("limit must be a positive integer", 400)
+
+    # Topic filter is an indexed query (SQLite, so run in a thread); limit then samples within the topic
+    topic = request.query.get('topic')
+    if topic is not None:
+        search_indexes = request.app['search_indexes']
+        positions = await asyncio.to_thread(lambda: search_indexes.get(snapshot).topic_positions(topic))
+        if limit and limit < len(positions):
+            return send_sample(request, snapshot, view, limit, within=positions)
+        return json_body(view.select_body(positions))
+
+    if limit and limit < len(snapshot.questions):
+        return send_sample(request, snapshot, view, limit)
+
+    # Streaming and paginated variants of the full bank
+    accept = parse_accept_header(request.headers.get('Accept'), MIMEAccept)
+    wants_ndjson = request.query.get('format') == 'ndjson' or (
+        accept.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+    )
+    if wants_ndjson:
+        return await send_ndjson(request, snapshot, view)
+    if any(key in request.query for key in ('offset', 'page_size', 'cursor')):
+        page_size = int_arg(request, 'page_size', 50)
+        try:
+            offset = resolve_page(snapshot, page_size, request.query.get('cursor'), int_arg(request, 'offset', 0))
+        except PageError as e:
+            return json_error(str(e), e.status)
+        return json_body(page_body(snapshot, view, offset, page_size))
+
+    return await send_encoded(request, view.all_questions)
+
+
+async def get_question(request):
+    """API endpoint to get a specific question by ID"""
+    question_id = int(request.match_info['question_id'])
+    body = request.app['bank'].get().view(wants_answers(request.query)).get_body(question_id)
+    if body is not None:
+        return json_body(body)
+    return json_error("Question not found", 404)
+
+
+async def watch_bank(app):
+    """Check the bank file every interval and load changes in a worker thread"""
+    bank = app['bank']
+    while True:
+        await asyncio.sleep(app['check_interval'])
+        try:
+            await asyncio.to_thread(bank.refresh)
+        except Exception:
+            # Keep watching; the next change to the file may well load
+            logger.exception('Question bank reload failed')
+
+
+async def start_watcher(app):
+    app['watcher'] = asyncio.create_task(watch_bank(app))
+
+
+async def stop_watcher(app):
+    app['watcher'].cancel()
+
+
+def create_app(questions_path=None, check_interval=None, db_path=None):
+    """Build the aiohttp application; arguments default to the same env vars as app.py"""
+    app = web.Application()
+    app['check_interval'] = check_interval if check_interval is not None else float(
+        os.environ.get('BANK_CHECK_INTERVAL', 1.0)
+    )
+    # Handlers never stat or load the file themselves; watch_bank does
+    app['bank'] = QuestionBank(
+        questions_path or os.environ.get('QUESTIONS_PATH', os.path.join(data_dir, 'az104_questions.json')),
+        check_interval=float('inf'),
+    )
+    app['bank'].get()
+    app['search_indexes'] = IndexCache(db_path or os.environ.get('QUESTIONS_DB'))
+
+    app.router.add_get('/api/questions', get_questions)
+    app.router.add_get(r'/api/question/{question_id:\d+}', get_question)
+    app.on_startup.append(start_watcher)
+    app.on_cleanup.append(stop_watcher)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', 5000)))
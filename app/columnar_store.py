@@ -0,0 +1,225 @@
+"""
+Compact columnar question store, memory-mapped at load time.
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header      magic, counts, the ETags of both JSON views, and an
+                (offset, length) table for the sections below
+    ids         int64[n]        question ids in bank order
+    sorted_ids  int64[n]        ids ascending, for binary-search lookups
+    sorted_pos  int64[n]        bank position of each entry of sorted_ids
+    answers     uint8[n]        correct answer code ('A' == 0), 255 if missing
+    topics      int32[n]        index into the topic name table
+    topic_offs  uint64[t + 1]   start of each topic name in topic_blob
+    topic_blob  UTF-8           topic names back to back
+    full_offs   uint64[n + 1]   start of each question in full_blob
+    full_blob   UTF-8           '[' + the questions as compact JSON, comma-separated + ']'
+    pub_offs    uint64[n + 1]   as full_offs, for the answer-free projection
+    pub_blob    UTF-8           as full_blob, without correct_answer
+
+Each blob is itself the ready-to-send JSON array, so the full-bank response
+and any contiguous page are single slices of the mapped file. The offset
+tables end with a sentinel one past the closing bracket, which makes the
+span of question i always blob[offs[i]:offs[i + 1] - 1].
+"""
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from grading import AnswerKey, encode_letters, is_question_id
+from sampling import Sampler
+from serialization import EncodedBody, content_etag, dump_json, public_projection
+
+MAGIC = b'QBANK01\n'
+SECTIONS = (
+    'ids', 'sorted_ids', 'sorted_pos', 'answers', 'topics',
+    'topic_offs', 'topic_blob', 'full_offs', 'full_blob', 'pub_offs', 'pub_blob',
+)
+HEADER = struct.Struct('<8sII32s32s' + 'QQ' * len(SECTIONS))
+
+
+def _join_bodies(bodies):
+    """Build a JSON array blob and the start offset of every element in it"""
+    offsets = np.empty(len(bodies) + 1, dtype=np.uint64)
+    position = 1
+    for i, body in enumerate(bodies):
+        offsets[i] = position
+        position += len(body) + 1
+    blob = b'[' + b','.join(bodies) + b']'
+    offsets[len(bodies)] = len(blob)
+    return offsets, blob
+
+
+def write_store(questions, path):
+    """Compile a list of question dicts into a columnar store at `path`"""
+    ids = np.array([question['id'] for question in questions], dtype=np.int64)
+    sorted_pos = np.argsort(ids, kind='stable').astype(np.int64)
+    answers = encode_letters([question.get('correct_answer') for question in questions])
+
+    topics = np.array([question.get('topic') or '' for question in questions], dtype=object)
+    topic_names, topic_codes = np.unique(topics, return_inverse=True)
+    topic_bytes = [str(name).encode('utf-8') for name in topic_names]
+    topic_offs = np.cumsum([0] + [len(name) for name in topic_bytes], dtype=np.uint64)
+
+    full_offs, full_blob = _join_bodies([dump_json(question) for question in questions])
+    pub_offs, pub_blob = _join_bodies([dump_json(public_projection(question)) for question in questions])
+
+    sections = {
+        'ids': ids.tobytes(),
+        'sorted_ids': ids[sorted_pos].tobytes(),
+        'sorted_pos': sorted_pos.tobytes(),
+        'answers': answers.tobytes(),
+        'topics': topic_codes.astype(np.int32).tobytes(),
+        'topic_offs': topic_offs.tobytes(),
+        'topic_blob': b''.join(topic_bytes),
+        'full_offs': full_offs.tobytes(),
+        'full_blob': full_blob,
+        'pub_offs': pub_offs.tobytes(),
+        'pub_blob': pub_blob,
+    }
+
+    table = []
+    position = HEADER.size
+    for name in SECTIONS:
+        position += -position % 8
+        table.extend((position, len(sections[name])))
+        position += len(sections[name])
+
+    header = HEADER.pack(
+        MAGIC, len(questions), len(topic_bytes),
+        content_etag(full_blob).encode('ascii'), content_etag(pub_blob).encode('ascii'),
+        *table,
+    )
+
+    # Write next to the target and rename, so running servers that have the
+    # old file mapped keep reading a consistent (unlinked) copy
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for name in SECTIONS:
+            f.write(b'\0' * (-f.tell() % 8))
+            f.write(sections[name])
+    os.replace(tmp_path, path)
+
+
+class MappedView:
+    """BankView backed by one JSON blob of a mapped store"""
+
+    def __init__(self, blob, offsets, answer_key, etag):
+        self.blob = blob
+        self.offsets = offsets
+        self.answer_key = answer_key
+        self.all_questions = EncodedBody(blob, etag=etag)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def body_at(self, position):
+        return bytes(self.blob[int(self.offsets[position]):int(self.offsets[position + 1]) - 1])
+
+    def get_body(self, question_id):
+        # Ids past int64 can't be in the key, and would overflow its lookup
+        if not is_question_id(question_id):
+            return None
+        position = self.answer_key.position(question_id)
+        return None if position is None else self.body_at(position)
+
+    def page_body(self, offset, page_size):
+        end = min(offset + page_size, len(self))
+        if offset >= end:
+            return b'[]'
+        # Consecutive questions are already comma-separated in the blob
+        return b'[' + self.blob[int(self.offsets[offset]):int(self.offsets[end]) - 1] + b']'
+
+    def select_body(self, positions):
+        return b'[' + b','.join(self.body_at(i) for i in positions) + b']'
+
+    def iter_ndjson(self, offset=0):
+        for position in range(offset, len(self)):
+            yield self.body_at(position) + b'\n'
+
+
+class MappedQuestions:
+    """Read-only sequence that decodes question dicts from the mapped store on access"""
+
+    def __init__(self, view):
+        self._view = view
+
+    def __len__(self):
+        return len(self._view)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return json.loads(self._view.body_at(position))
+
+
+class MappedSnapshot:
+    """
+    BankSnapshot over a memory-mapped columnar store.
+
+    Nothing is parsed up front: columns are numpy views onto the mapping,
+    so every worker process shares the same page-cache pages.
+    """
+
+    def __init__(self, path, mtime=None, size=None):
+        self.mtime = mtime
+        self.size = size
+        self.loaded_at = time.time()
+
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+
+        fields = HEADER.unpack_from(buffer, 0)
+        magic, count, topic_count, full_etag, pub_etag = fields[:5]
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a question store")
+        table = dict(zip(SECTIONS, zip(fields[5::2], fields[6::2])))
+
+        def column(name, dtype, length):
+            offset, _ = table[name]
+            return np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+
+        def blob(name):
+            offset, length = table[name]
+            return buffer[offset:offset + length]
+
+        answers = column('answers', np.uint8, count)
+        self.answer_key = AnswerKey(
+            column('sorted_ids', np.int64, count), column('sorted_pos', np.int64, count), answers,
+        )
+
+        topic_offs = column('topic_offs', np.uint64, topic_count + 1)
+        topic_blob = blob('topic_blob')
+        topic_names = [
+            bytes(topic_blob[int(topic_offs[i]):int(topic_offs[i + 1])]).decode('utf-8')
+            for i in range(topic_count)
+        ]
+        self.sampler = Sampler(column('topics', np.int32, count), topic_names)
+
+        self.full = MappedView(
+            blob('full_blob'), column('full_offs', np.uint64, count + 1),
+            self.answer_key, full_etag.decode('ascii'),
+        )
+        self.public = MappedView(
+            blob('pub_blob'), column('pub_offs', np.uint64, count + 1),
+            self.answer_key, pub_etag.decode('ascii'),
+        )
+        self.version = self.full.all_questions.etag
+        self.questions = MappedQuestions(self.full)
+
+    def view(self, with_answers=True):
+        return self.full if with_answers else self.public
+
+    @property
+    def signature(self):
+        return (self.mtime, self.size)
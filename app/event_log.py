@@ -0,0 +1,212 @@
+import atexit
+import glob
+import os
+import queue
+import secrets
+import threading
+import time
+import zlib
+
+import numpy as np
+
+# One fixed-width little-endian record per answer event (22 bytes)
+EVENT_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('question_id', '<i8'),
+    ('answer', 'u1'),
+    ('correct', 'u1'),
+    ('respondent', '<u4'),
+])
+
+# Each segment starts with this header so stray files are never replayed
+SEGMENT_MAGIC = b'QEVLOG01'
+SEGMENT_SUFFIX = '.events'
+
+# Value of the correct field when the event didn't say
+UNKNOWN = 255
+
+# Respondent 0 means anonymous
+ANONYMOUS = 0
+
+
+def respondent_tag(key):
+    """Stable 32-bit tag for a respondent key such as a session id"""
+    return zlib.crc32(key.encode('utf-8')) or 1
+
+
+def batch_tag():
+    """Random tag for a one-off respondent, e.g. an exam graded in one batch"""
+    return secrets.randbits(32) or 1
+
+
+def make_events(question_ids, answers, correct=None, respondent=ANONYMOUS, now=None):
+    """Build an event array from parallel question ids and answer codes"""
+    events = np.zeros(len(question_ids), dtype=EVENT_DTYPE)
+    events['time'] = time.time() if now is None else now
+    events['question_id'] = question_ids
+    events['answer'] = answers
+    events['correct'] = UNKNOWN if correct is None else correct
+    events['respondent'] = respondent
+    return events
+
+
+class EventLog:
+    """
+    Write-behind, append-only log of answer events.
+
+    Request threads only put event arrays on a bounded queue; a single
+    background thread drains everything queued, appends it to the current
+    segment in one write and fsyncs once for the whole group. Segments are
+    rotated when they pass `segment_bytes`. When the queue is full,
+    submit() refuses the events rather than blocking the request.
+
+    Segment names start with the time they were opened and include the
+    process id, so several server workers can share a directory.
+    """
+
+    def __init__(self, directory, segment_bytes=64 << 20, queue_size=10000, fsync=True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.queue_size = queue_size
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.submitted = 0
+        self.rejected = 0
+        self.written = 0
+        self.commits = 0
+        self.segments = 0
+        self.errors = 0
+        self.lost = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        atexit.register(self.close)
+
+    def _ensure_writer(self):
+        # Started lazily so a writer exists in each forked server worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(self.queue_size)
+                self._thread = threading.Thread(target=self._run, name='event-log-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, events):
+        """Queue an event array for writing; False if the queue is full"""
+        if not len(events):
+            return True
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(events)
+        except queue.Full:
+            with self._lock:
+                self.rejected += len(events)
+            return False
+        with self._lock:
+            self.submitted += len(events)
+        return True
+
+    def _open_segment(self):
+        name = f'{time.time_ns() // 1000:016d}-{os.getpid()}{SEGMENT_SUFFIX}'
+        # Buffered, so write() takes all the data; flush() hands it to the OS
+        segment = open(os.path.join(self.directory, name), 'ab')
+        segment.write(SEGMENT_MAGIC)
+        self.segments += 1
+        return segment
+
+    @staticmethod
+    def _discard(segment):
+        """Close a segment after a failed write, ignoring a second failure"""
+        try:
+            segment.close()
+        except OSError:
+            pass
+
+    def _run(self):
+        events_queue = self._queue
+        segment = None
+        size = 0
+        done = False
+        while not done:
+            group = [events_queue.get()]
+            # Group commit: take everything else already waiting
+            while True:
+                try:
+                    group.append(events_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(events is None for events in group):
+                group = [events for events in group if events is not None]
+                done = True
+            if not group:
+                continue
+            data = np.concatenate(group).tobytes()
+            try:
+                if segment is None or size >= self.segment_bytes:
+                    if segment is not None:
+                        segment.close()
+                    segment = self._open_segment()
+                    size = len(SEGMENT_MAGIC)
+                segment.write(data)
+                segment.flush()
+                if self.fsync:
+                    os.fsync(segment.fileno())
+                size += len(data)
+                self.written += len(data) // EVENT_DTYPE.itemsize
+                self.commits += 1
+            except OSError:
+                # The group is dropped and the next one starts a fresh segment
+                self.errors += 1
+                self.lost += len(data) // EVENT_DTYPE.itemsize
+                if segment is not None:
+                    self._discard(segment)
+                segment = None
+        if segment is not None:
+            segment.close()
+
+    def close(self, timeout=5.0):
+        """Write out whatever is queued and stop the writer"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize() if self._pid == os.getpid() else 0,
+            'queue_size': self.queue_size,
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'written': self.written,
+            'commits': self.commits,
+            'segments': self.segments,
+            'errors': self.errors,
+            'lost': self.lost,
+        }
+
+
+def segment_paths(directory):
+    """Segments in the order they were opened"""
+    return sorted(glob.glob(os.path.join(directory, '*' + SEGMENT_SUFFIX)))
+
+
+def read_segment(path):
+    """Event array stored in one segment; a torn last record is ignored"""
+    with open(path, 'rb') as f:
+        if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        data = f.read()
+    whole = len(data) - len(data) % EVENT_DTYPE.itemsize
+    return np.frombuffer(data[:whole], dtype=EVENT_DTYPE)
+
+
+def replay(directory):
+    """Yield the event array of every segment in a log directory, oldest first"""
+    for path in segment_paths(directory):
+        yield read_segment(path)
@@ -0,0 +1,86 @@
+import numpy as np
+
+# Option letters are stored as small integers; this marks "no answer"
+NO_ANSWER = 255
+
+
+def encode_letters(letters):
+    """Map option letters ('A'..'Z') to uint8 codes, anything else to NO_ANSWER"""
+    codes = np.full(len(letters), NO_ANSWER, dtype=np.uint8)
+    for i, letter in enumerate(letters):
+        if isinstance(letter, str) and len(letter) == 1 and 'A' <= letter.upper() <= 'Z':
+            codes[i] = ord(letter.upper()) - ord('A')
+    return codes
+
+
+def is_question_id(value):
+    """True for a JSON integer that fits the int64 id columns (bools don't count)"""
+    return isinstance(value, int) and not isinstance(value, bool) and -2**63 <= value < 2**63
+
+
+def decode_letter(code):
+    return chr(ord('A') + int(code)) if code != NO_ANSWER else None
+
+
+class AnswerKey:
+    """
+    Correct answers for one bank version, laid out for vectorized grading.
+
+    Ids are kept sorted next to their bank positions and a fixed-width
+    answer-code column, so a whole exam can be looked up with one
+    searchsorted and graded with one comparison instead of a Python loop
+    over the question dicts.
+    """
+
+    def __init__(self, sorted_ids, sorted_positions, answers):
+        # sorted_positions[i] is the bank position of the question with sorted_ids[i];
+        # answers is indexed by bank position
+        self.ids = sorted_ids
+        self.positions = sorted_positions
+        self.answers = answers
+
+    @classmethod
+    def from_questions(cls, questions):
+        ids = np.array([question['id'] for question in questions], dtype=np.int64)
+        answers = encode_letters([question.get('correct_answer') for question in questions])
+        order = np.argsort(ids, kind='stable').astype(np.int64)
+        return cls(ids[order], order, answers)
+
+    def locate(self, question_ids):
+        """Return (found mask, bank positions) for an array of ids"""
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.zeros(len(question_ids), dtype=bool), np.zeros(len(question_ids), dtype=np.int64)
+        slots = np.searchsorted(self.ids, question_ids).clip(max=len(self.ids) - 1)
+        found = self.ids[slots] == question_ids
+        return found, self.positions[slots]
+
+    def ids_at(self, positions):
+        """Question ids at an array of bank positions"""
+        by_position = np.empty_like(self.ids)
+        by_position[self.positions] = self.ids
+        return by_position[np.asarray(positions, dtype=np.int64)]
+
+    def position(self, question_id):
+        """Bank position of one question, or None if the id is unknown"""
+        found, positions = self.locate([question_id])
+        return int(positions[0]) if found[0] else None
+
+    def lookup(self, question_ids):
+        """Return (found mask, correct answer codes) for an array of ids"""
+        found, positions = self.locate(question_ids)
+        if not len(self.answers):
+            return found, np.full(len(found), NO_ANSWER, dtype=np.uint8)
+        return found, np.where(found, self.answers[positions], NO_ANSWER).astype(np.uint8)
+
+    def grade(self, question_ids, selected):
+        """
+        Grade parallel lists of question ids and selected letters.
+
+        Returns (found, correct, correct_codes) arrays; unknown ids are
+        never correct.
+        """
+        found, correct_codes = self.lookup(question_ids)
+        chosen = encode_letters(selected)
+        correct = found & (chosen == correct_codes) & (chosen != NO_ANSWER)
+        return found, correct, correct_codes
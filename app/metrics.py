@@ -0,0 +1,106 @@
+import bisect
+import math
+import threading
+
+# Latency buckets in seconds, from a cached body (~100us) to a slow full load
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Response size buckets in bytes, from an error body to the full bank and beyond
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, one set of buckets per label combination.
+
+    observe() is a bisect plus a few additions under the metric's lock;
+    buckets are only made cumulative when the metric is scraped.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.bounds) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', _labels(self.labelnames, labels, [('le', _number(bound))]), cumulative
+            yield f'{self.name}_sum', _labels(self.labelnames, labels), total
+            yield f'{self.name}_count', _labels(self.labelnames, labels), cumulative
+
+
+class Sampled:
+    """A counter or gauge read from elsewhere (e.g. QuestionBank.stats()) at scrape time"""
+
+    def __init__(self, name, help, kind, read):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.read = read
+
+    def samples(self):
+        yield self.name, '', self.read()
+
+
+class Registry:
+    """The app's metrics, rendered in the Prometheus text exposition format"""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def sampled(self, name, help, kind, read):
+        return self._add(Sampled(name, help, kind, read))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_number(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,67 @@
+import base64
+import binascii
+
+from serialization import dump_json
+
+# Largest page a client may request from /api/questions
+MAX_PAGE_SIZE = 500
+
+
+class PageError(ValueError):
+    """A paging request the client has to fix; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_cursor(version, offset):
+    """Opaque pagination cursor tied to one bank version"""
+    raw = f"{version}:{offset}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        version, offset = raw.decode('ascii').split(':')
+        return version, int(offset)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+
+def resolve_page(snapshot, page_size, cursor=None, offset=0):
+    """Validate paging parameters and return the offset to start from, or raise PageError"""
+    if page_size < 1 or page_size > MAX_PAGE_SIZE:
+        raise PageError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    if cursor:
+        try:
+            version, offset = decode_cursor(cursor)
+        except ValueError:
+            raise PageError("Invalid cursor")
+        if version != snapshot.version:
+            # The bank was reloaded; offsets into the old version are meaningless
+            raise PageError("Cursor is stale, restart pagination", status=409)
+    if offset < 0:
+        raise PageError("offset must not be negative")
+    return offset
+
+
+def page_body(snapshot, view, offset, page_size):
+    """One page of questions plus paging metadata, as a ready-to-send JSON body"""
+    total = len(view)
+    next_offset = offset + page_size
+    meta = dump_json({
+        'offset': offset,
+        'page_size': page_size,
+        'total': total,
+        'version': snapshot.version,
+        'next_cursor': encode_cursor(snapshot.version, next_offset) if next_offset < total else None,
+    })
+    return b'{"questions":' + view.page_body(offset, page_size) + b',' + meta[1:]
+
+
+def ndjson_headers(snapshot, view):
+    """Headers of an NDJSON stream of the whole bank, sent before its first line"""
+    return {'X-Total-Count': str(len(view)), 'X-Bank-Version': snapshot.version}
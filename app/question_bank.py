@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from columnar_store import MappedSnapshot
+from grading import AnswerKey
+from sampling import Sampler
+from serialization import EncodedBody, dump_json, public_projection
+
+# Files with this suffix are compiled stores built by data/build_store.py
+STORE_SUFFIX = '.qbank'
+
+logger = logging.getLogger(__name__)
+
+
+def check_questions(questions):
+    """Raise ValueError unless `questions` is a list of question objects with integer ids"""
+    if not isinstance(questions, list):
+        raise ValueError('question bank must be a JSON array')
+    for index, question in enumerate(questions):
+        if not isinstance(question, dict) or not isinstance(question.get('id'), int) or isinstance(
+            question.get('id'), bool
+        ):
+            raise ValueError(f'question {index} is not an object with an integer id')
+        if not isinstance(question.get('options', {}), dict):
+            raise ValueError(f'question {index} has options that are not an object')
+
+class BankView:
+    """Pre-serialized bodies for one projection of the bank's questions"""
+
+    def __init__(self, questions, project=None):
+        # id -> ready-to-send JSON body for that question
+        bodies = [dump_json(project(q) if project else q) for q in questions]
+        self.question_bodies = bodies
+        self.question_json = {question['id']: body for question, body in zip(questions, bodies)}
+
+        # Full bank response, assembled once per version from the per-question bodies
+        self.all_questions = EncodedBody(b'[' + b','.join(bodies) + b']')
+
+    def __len__(self):
+        return len(self.question_bodies)
+
+    def get_body(self, question_id):
+        """JSON bytes for one question, or None if the id is unknown"""
+        return self.question_json.get(question_id)
+
+    def page_body(self, offset, page_size):
+        """JSON array bytes for questions[offset:offset + page_size]"""
+        return b'[' + b','.join(self.question_bodies[offset:offset + page_size]) + b']'
+
+    def select_body(self, positions):
+        """JSON array bytes for the questions at the given list positions"""
+        bodies = self.question_bodies
+        return b'[' + b','.join(bodies[i] for i in positions) + b']'
+
+    def iter_ndjson(self, offset=0):
+        """Yield one JSON line per question, starting at `offset`"""
+        bodies = self.question_bodies
+        for index in range(offset, len(bodies)):
+            yield bodies[index] + b'\n'
+
+
+class BankSnapshot:
+    """One parsed, read-only version of the question bank"""
+
+    def __init__(self, questions, mtime=None, size=None):
+        self.questions = questions
+        self.mtime = mtime
+        self.size = size
+        self.loaded_at = time.time()
+
+        self.full = BankView(questions)
+        self.public = BankView(questions, public_projection)
+        self.version = self.full.all_questions.etag
+        self.sampler = Sampler.from_questions(questions)
+        self.answer_key = AnswerKey.from_questions(questions)
+
+    def view(self, with_answers=True):
+        return self.full if with_answers else self.public
+
+    @property
+    def signature(self):
+        return (self.mtime, self.size)
+
+
+class QuestionBank:
+    """
+    Parses the question bank JSON once and keeps it in memory.
+
+    The file is re-stat'ed at most every `check_interval` seconds; when its
+    mtime or size changes a single thread parses the new version and swaps
+    it in as a whole, so readers always see one consistent snapshot.
+    `on_load`, if given, is called with the seconds each successful load took.
+    """
+
+    def __init__(self, path, check_interval=1.0, on_load=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.on_load = on_load
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._snapshot = None
+        self._next_check = 0.0
+        # Signature of a file version that failed to load, so it isn't parsed again
+        self._failed_signature = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.errors = 0
+        self.last_load_seconds = None
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def file_signature(self):
+        """(mtime_ns, size) of the bank file, or (None, None) if it is missing"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return (None, None)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _parse(self, signature):
+        if signature == (None, None):
+            # If the JSON file doesn't exist yet, serve an empty bank
+            return BankSnapshot([])
+        if self.path.endswith(STORE_SUFFIX):
+            # Compiled columnar store: map it instead of parsing
+            return MappedSnapshot(self.path, *signature)
+        with open(self.path, 'r') as f:
+            questions = json.load(f)
+        check_questions(questions)
+        return BankSnapshot(questions, *signature)
+
+    def get(self):
+        """Return the current snapshot, reloading it if the file changed"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now < self._next_check:
+            self._count('hits')
+            return snapshot
+        return self._check(snapshot, now)
+
+    def _check(self, snapshot, now):
+        """Stat the file and load it if it differs from `snapshot`"""
+        signature = self.file_signature()
+        if snapshot is not None and signature in (snapshot.signature, self._failed_signature):
+            self._next_check = now + self.check_interval
+            self._count('hits')
+            return snapshot
+
+        with self._lock:
+            # Another thread may have swapped in (or failed on) this version while we waited
+            snapshot = self._snapshot
+            if snapshot is not None and signature in (snapshot.signature, self._failed_signature):
+                self._count('hits')
+                return snapshot
+            load_start = time.perf_counter()
+            try:
+                fresh = self._parse(signature)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # Half-written or malformed file: keep serving the old version
+                logger.exception('Could not load question bank %s', self.path)
+                self._count('errors')
+                if snapshot is None:
+                    raise
+                # Logged and parsed once; the file is retried when it changes again
+                self._failed_signature = signature
+                self._next_check = now + self.check_interval
+                return snapshot
+            self.last_load_seconds = time.perf_counter() - load_start
+            if self.on_load is not None:
+                self.on_load(self.last_load_seconds)
+            self._count('misses')
+            if snapshot is not None:
+                self._count('reloads')
+            self._snapshot = fresh
+            self._next_check = now + self.check_interval
+            return fresh
+
+    def refresh(self):
+        """
+        Re-stat the file now, ignoring check_interval; True if a new version was loaded.
+
+        Readers calling get() meanwhile keep getting the current snapshot
+        without waiting, so a loader thread can call this while an event
+        loop (or a gunicorn master) keeps serving.
+        """
+        previous = self._snapshot
+        return self._check(previous, time.monotonic()) is not previous
+
+    def stats(self):
+        """Counters for confirming the cache is doing its job"""
+        snapshot = self._snapshot
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'errors': self.errors,
+            'questions': len(snapshot.questions) if snapshot else 0,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'last_load_seconds': self.last_load_seconds,
+        }
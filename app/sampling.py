@@ -0,0 +1,93 @@
+import secrets
+
+import numpy as np
+
+
+def new_seed():
+    """A fresh seed to hand back to clients that didn't supply one"""
+    return secrets.randbits(32)
+
+
+def sample_body(snapshot, view, limit, seed=None, stratify=None, within=None):
+    """
+    (JSON body, seed) of a random quiz of `limit` questions, from the seed
+    and stratify query parameters as sent; the same seed always yields the
+    same quiz, and a missing or invalid one is replaced by a fresh seed
+    """
+    try:
+        seed = int(seed)
+    except (TypeError, ValueError):
+        seed = None
+    if seed is None or seed < 0:
+        seed = new_seed()
+    stratify = (stratify or '').lower() in ('1', 'true', 'topic')
+    positions = snapshot.sampler.sample(limit, seed=seed, stratify=stratify, within=within)
+    return view.select_body(positions), seed
+
+
+class Sampler:
+    """
+    Draws random subsets of a bank as index arrays.
+
+    Questions are never copied: callers get positions into the snapshot's
+    question list and serialize only those. Questions may carry an optional
+    'topic' tag, which enables proportional stratified sampling.
+    """
+
+    def __init__(self, topic_codes, topic_names):
+        # topic_codes[i] indexes topic_names for the question at position i
+        self.size = len(topic_codes)
+        self.topic_codes = topic_codes
+        self.topic_names = topic_names
+        order = np.argsort(topic_codes, kind='stable')
+        bounds = np.searchsorted(topic_codes[order], np.arange(len(topic_names) + 1))
+        # topic -> positions of its questions in the bank, in bank order
+        self.strata = {
+            str(name): order[bounds[i]:bounds[i + 1]]
+            for i, name in enumerate(topic_names)
+        }
+
+    @classmethod
+    def from_questions(cls, questions):
+        topics = np.array([question.get('topic') or '' for question in questions], dtype=object)
+        topic_names, codes = np.unique(topics, return_inverse=True)
+        return cls(codes.astype(np.int32), [str(name) for name in topic_names])
+
+    @property
+    def tagged(self):
+        return bool(self.strata) and set(self.strata) != {''}
+
+    def sample(self, k, seed=None, stratify=False, within=None):
+        """
+        Return `k` distinct positions, reproducible for a given seed.
+
+        `within` restricts the draw to a subset of positions, e.g. the
+        result of a topic query.
+        """
+        rng = np.random.default_rng(seed)
+        if within is not None:
+            within = np.asarray(within, dtype=np.int64)
+            return rng.choice(within, size=min(k, len(within)), replace=False)
+        k = min(k, self.size)
+        if stratify and self.tagged:
+            return self._sample_stratified(rng, k)
+        return rng.choice(self.size, size=k, replace=False)
+
+    def _sample_stratified(self, rng, k):
+        names = sorted(self.strata)
+        sizes = np.array([len(self.strata[name]) for name in names])
+
+        # Proportional allocation, handing leftovers to the largest remainders
+        exact = sizes * (k / self.size)
+        counts = np.floor(exact).astype(np.int64)
+        remainders = exact - counts
+        remainders[counts >= sizes] = -1
+        for i in np.argsort(-remainders, kind='stable')[:k - counts.sum()]:
+            counts[i] += 1
+
+        picked = [
+            rng.choice(self.strata[name], size=count, replace=False)
+            for name, count in zip(names, counts) if count
+        ]
+        # Interleave topics rather than serving them in blocks
+        return rng.permutation(np.concatenate(picked))
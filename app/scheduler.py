@@ -0,0 +1,192 @@
+import collections
+import heapq
+import math
+import threading
+import time
+import zlib
+from array import array
+
+# SM-2 style parameters; intervals are in seconds
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+EASE_BONUS = 0.1
+EASE_PENALTY = 0.2
+FIRST_INTERVAL = 10 * 60
+SECOND_INTERVAL = 24 * 3600
+RELEARN_INTERVAL = 60
+
+
+class LearnerSchedule:
+    """
+    Review state of one learner, one slot per question seen so far.
+
+    Slots live in parallel typed arrays (question id, ease, interval, due
+    time, streak), and a heap of (due, slot) entries orders them. A review
+    pushes a fresh entry and leaves the old one behind; stale entries are
+    recognised by a due time that no longer matches the slot's and are
+    dropped when they reach the top. Questions never seen are introduced
+    in a per-learner pseudo-random order that needs no stored permutation;
+    when the bank changes (a new version or size) the order is walked
+    again from the start, skipping questions already seen.
+    """
+
+    def __init__(self, learner_id):
+        self.learner_id = learner_id
+        self.ids = array('q')
+        self.ease = array('f')
+        self.interval = array('f')
+        self.due = array('d')
+        self.streak = array('H')
+        self.slots = {}
+        self.heap = []
+        # Steps taken through the introduction order, the (bank version,
+        # size) it was computed for, and where this learner's order starts
+        self.introduced = 0
+        self.order_bank = None
+        self.seed = zlib.crc32(learner_id.encode('utf-8'))
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _slot(self, question_id, now):
+        slot = self.slots.get(question_id)
+        if slot is None:
+            slot = len(self.ids)
+            self.slots[question_id] = slot
+            self.ids.append(question_id)
+            self.ease.append(INITIAL_EASE)
+            self.interval.append(0.0)
+            self.due.append(now)
+            self.streak.append(0)
+            heapq.heappush(self.heap, (now, slot))
+        return slot
+
+    def _top(self, known):
+        """Slot with the earliest due time, or None; drops stale entries and removed questions"""
+        heap = self.heap
+        while heap:
+            due, slot = heap[0]
+            if self.due[slot] == due and known(self.ids[slot]):
+                return slot
+            heapq.heappop(heap)
+        return None
+
+    def _new_question(self, bank_ids, version=None):
+        """Next question id in this learner's introduction order not yet seen, or None"""
+        size = len(bank_ids)
+        if not size:
+            return None
+        if (version, size) != self.order_bank:
+            # Other ids, or a stride over a different count, so start the walk over
+            self.introduced = 0
+            self.order_bank = (version, size)
+        # Walking the sorted ids with a stride coprime to their count visits each once
+        step = self.seed % size or 1
+        while math.gcd(step, size) != 1:
+            step += 1
+        while self.introduced < size:
+            question_id = int(bank_ids[(self.seed + self.introduced * step) % size])
+            self.introduced += 1
+            if question_id not in self.slots:
+                return question_id
+        return None
+
+    def next_question(self, bank_ids, known, now, version=None):
+        """
+        Return (question id, is due) for the question to ask next.
+
+        A due review comes first, then a question not seen before; when
+        everything has been seen and nothing is due, the review due
+        soonest is offered early. None for an empty bank.
+        """
+        slot = self._top(known)
+        if slot is not None and self.due[slot] <= now:
+            return self.ids[slot], True
+        question_id = self._new_question(bank_ids, version)
+        if question_id is not None:
+            # Scheduled right away so it is asked again until it is answered
+            self._slot(question_id, now)
+            return question_id, True
+        if slot is not None:
+            return self.ids[slot], False
+        return None
+
+    def review(self, question_id, correct, now):
+        """Reschedule a question after an answer; returns the new due time"""
+        slot = self._slot(question_id, now)
+        if correct:
+            streak = self.streak[slot] + 1
+            if streak == 1:
+                interval = FIRST_INTERVAL
+            elif streak == 2:
+                interval = SECOND_INTERVAL
+            else:
+                interval = self.interval[slot] * self.ease[slot]
+            self.ease[slot] += EASE_BONUS
+            self.streak[slot] = min(streak, 0xFFFF)
+        else:
+            interval = RELEARN_INTERVAL
+            self.ease[slot] = max(MIN_EASE, self.ease[slot] - EASE_PENALTY)
+            self.streak[slot] = 0
+        self.interval[slot] = interval
+        self.due[slot] = due = now + interval
+        heapq.heappush(self.heap, (due, slot))
+
+        # Stale entries pile up on frequently reviewed questions; rebuild occasionally
+        if len(self.heap) > 2 * len(self.ids) + 64:
+            self.heap = [(self.due[slot], slot) for slot in range(len(self.ids))]
+            heapq.heapify(self.heap)
+        return due
+
+
+class Scheduler:
+    """
+    Spaced-repetition schedules for many learners, kept in memory.
+
+    Learners are identified by an opaque id chosen by the client. At most
+    `max_learners` schedules are held, least recently used first out, and
+    one idle for `ttl` seconds is dropped. Each schedule has its own lock,
+    so learners never wait on each other beyond the dictionary lookup.
+    """
+
+    def __init__(self, max_learners=10000, ttl=30 * 24 * 3600):
+        self.max_learners = max_learners
+        self.ttl = ttl
+        self._learners = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def learner(self, learner_id):
+        now = time.time()
+        with self._lock:
+            schedule = self._learners.get(learner_id)
+            if schedule is None or now - schedule.updated > self.ttl:
+                schedule = self._learners[learner_id] = LearnerSchedule(learner_id)
+            self._learners.move_to_end(learner_id)
+            schedule.updated = now
+            while len(self._learners) > self.max_learners:
+                self._learners.popitem(last=False)
+                self.evictions += 1
+        return schedule
+
+    def next_question(self, learner_id, snapshot, now=None):
+        """(question id, is due) for a learner against a bank snapshot, or None"""
+        now = time.time() if now is None else now
+        answer_key = snapshot.answer_key
+        schedule = self.learner(learner_id)
+        with schedule.lock:
+            return schedule.next_question(
+                answer_key.ids, lambda question_id: answer_key.position(question_id) is not None, now,
+                snapshot.version,
+            )
+
+    def review(self, learner_id, question_id, correct, now=None):
+        now = time.time() if now is None else now
+        schedule = self.learner(learner_id)
+        with schedule.lock:
+            return schedule.review(question_id, correct, now)
+
+    def stats(self):
+        return {'learners': len(self._learners), 'max_learners': self.max_learners, 'evictions': self.evictions}
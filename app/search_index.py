@@ -0,0 +1,144 @@
+import itertools
+import os
+import pathlib
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS questions (
+    position INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    correct_answer TEXT,
+    question TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_id ON questions (id);
+CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic, position);
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5 (question, options, tokenize = 'porter unicode61');
+"""
+
+# Distinguishes the shared in-memory databases of successive bank versions
+_memory_names = itertools.count()
+
+
+def build_index(conn, questions, version):
+    """Load questions into an open (empty) database, rows keyed by bank position"""
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO questions (position, id, topic, correct_answer, question) VALUES (?, ?, ?, ?, ?)",
+            (
+                (position, q['id'], q.get('topic') or '', q.get('correct_answer'), q['question'])
+                for position, q in enumerate(questions)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO questions_fts (rowid, question, options) VALUES (?, ?, ?)",
+            (
+                (position, q['question'], '\n'.join(q.get('options', {}).values()))
+                for position, q in enumerate(questions)
+            ),
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query that matches all words, ignoring FTS syntax"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"' for term in terms if term)
+
+
+class SearchIndex:
+    """
+    SQLite index over one bank version, answering queries with bank positions.
+
+    Connections are per thread since sqlite3 connections can't be shared
+    across the server's request threads.
+    """
+
+    def __init__(self, database, uri=False, keeper=None):
+        self.database = database
+        self.uri = uri
+        # Holds an in-memory database open for as long as the index lives
+        self._keeper = keeper
+        self._local = threading.local()
+
+    @classmethod
+    def in_memory(cls, questions, version):
+        database = f"file:qbank-{os.getpid()}-{next(_memory_names)}?mode=memory&cache=shared"
+        keeper = sqlite3.connect(database, uri=True, check_same_thread=False)
+        build_index(keeper, questions, version)
+        return cls(database, uri=True, keeper=keeper)
+
+    @classmethod
+    def open_file(cls, path, version):
+        """Open a prebuilt database, or None if it is missing or from another bank version"""
+        if not os.path.exists(path):
+            return None
+        index = cls(f"{pathlib.Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            row = index._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.Error:
+            return None
+        return index if row and row[0] == version else None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database, uri=self.uri, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def search(self, text, limit=20, offset=0):
+        """Positions of questions whose text or options match every word, best first"""
+        query = fts_query(text)
+        if not query:
+            return []
+        rows = self._conn().execute(
+            "SELECT rowid FROM questions_fts WHERE questions_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+            (query, limit, offset),
+        )
+        return [row[0] for row in rows]
+
+    def topic_positions(self, topic):
+        rows = self._conn().execute(
+            "SELECT position FROM questions WHERE topic = ? ORDER BY position", (topic,)
+        )
+        return [row[0] for row in rows]
+
+    def topics(self):
+        rows = self._conn().execute(
+            "SELECT topic, COUNT(*) FROM questions GROUP BY topic ORDER BY topic"
+        )
+        return dict(rows.fetchall())
+
+
+class IndexCache:
+    """
+    Keeps the search index for the current bank version.
+
+    A database file built by data/build_sqlite.py is used when it matches
+    the loaded bank; otherwise an in-memory index is built on first use.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # (version, index), replaced as a whole so readers never pair one version with another's index
+        self._current = (None, None)
+
+    def get(self, snapshot):
+        version, index = self._current
+        if version == snapshot.version:
+            return index
+        with self._lock:
+            version, index = self._current
+            if version != snapshot.version:
+                index = None
+                if self.db_path:
+                    index = SearchIndex.open_file(self.db_path, snapshot.version)
+                if index is None:
+                    index = SearchIndex.in_memory(snapshot.questions, snapshot.version)
+                self._current = (snapshot.version, index)
+        return index
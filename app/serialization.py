@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+import threading
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Slice of a memory-mapped body copied per write when it is sent uncompressed
+CHUNK_SIZE = 256 << 10
+
+
+def content_etag(data):
+    """Strong validator for a serialized body"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def dump_json(obj):
+    """Serialize to compact UTF-8 JSON bytes, matching the app's jsonify output"""
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+class EncodedBody:
+    """
+    A serialized response body plus its compressed variants.
+
+    Variants are compressed on first use and then kept for the lifetime of
+    the bank version, so each encoding is paid for once per reload.
+    """
+
+    def __init__(self, data, etag=None):
+        # `data` may be a memoryview over a mapped file; `etag` can then be
+        # supplied precomputed so the whole body needn't be hashed at load
+        self.data = data
+        self.etag = etag or content_etag(data)
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available_encodings():
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def variant(self, encoding=None):
+        """
+        Return the body compressed with `encoding` ('br', 'gzip' or None).
+
+        The raw body is returned as stored, so for a mapped bank it is a
+        memoryview rather than a copy of the whole blob; see iter_chunks.
+        """
+        if encoding is None:
+            return self.data
+        body = self._variants.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._variants.get(encoding)
+            if body is None:
+                raw = self.variant(None)
+                if encoding == 'br':
+                    body = brotli.compress(raw, quality=9)
+                elif encoding == 'gzip':
+                    body = gzip.compress(raw, compresslevel=9, mtime=0)
+                else:
+                    raise ValueError(f"Unsupported encoding: {encoding}")
+                self._variants[encoding] = body
+        return body
+
+    def variant_etag(self, encoding=None):
+        # Strong ETags must differ between encoded representations
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+    def negotiate(self, accept_encodings):
+        """Best encoding the client accepts (a werkzeug Accept), or None for the raw body"""
+        return next((candidate for candidate in self.available_encodings() if accept_encodings[candidate]), None)
+
+
+def iter_chunks(data, size=CHUNK_SIZE):
+    """Bytes of a memoryview in slices, so it is sent without first copying all of it"""
+    for start in range(0, len(data), size):
+        yield bytes(data[start:start + size])
+
+
+def bank_version(questions):
+    """The version tag a loaded bank gets: the ETag of its full JSON array"""
+    return content_etag(b'[' + b','.join(dump_json(question) for question in questions) + b']')
+
+
+def wants_answers(args):
+    """False when a request's query args ask for the answer-free projection (?answers=0)"""
+    return args.get('answers', 'true').lower() not in ('0', 'false', 'no')
+
+
+def public_projection(question):
+    """A question as shown to quiz takers, without its correct answer"""
+    return {key: value for key, value in question.items() if key != 'correct_answer'}
@@ -0,0 +1,234 @@
+import collections
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from grading import NO_ANSWER
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    question_ids BLOB NOT NULL,
+    answers BLOB NOT NULL,
+    flags BLOB NOT NULL,
+    current INTEGER NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated);
+"""
+
+
+def new_session_id():
+    return secrets.token_urlsafe(12)
+
+
+class QuizSession:
+    """
+    Progress through one exam, stored as flat arrays.
+
+    question_ids is an int64 array in exam order (the width of the bank's
+    ids); answers holds one byte per question (an option code from
+    grading.encode_letters, NO_ANSWER until answered) and flags one bit per
+    question. A 600-question exam takes about 5 KB whatever the length of
+    its question text.
+    """
+
+    def __init__(self, session_id, question_ids, answers=None, flags=None, current=0, created=None, updated=None):
+        self.id = session_id
+        self.question_ids = np.asarray(question_ids, dtype=np.int64)
+        size = len(self.question_ids)
+        self.answers = bytearray(answers) if answers is not None else bytearray([NO_ANSWER]) * size
+        self.flags = bytearray(flags) if flags is not None else bytearray((size + 7) // 8)
+        self.current = current
+        self.created = created if created is not None else time.time()
+        self.updated = updated if updated is not None else self.created
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def position(self, question_id):
+        """Position of a question in the exam, or None if it isn't part of it"""
+        matches = np.flatnonzero(self.question_ids == question_id)
+        return int(matches[0]) if len(matches) else None
+
+    def answer_codes(self):
+        return np.frombuffer(bytes(self.answers), dtype=np.uint8)
+
+    def set_answer(self, position, code):
+        self.answers[position] = int(code)
+        self.current = max(self.current, position + 1)
+
+    def set_flag(self, position, flagged):
+        if flagged:
+            self.flags[position >> 3] |= 1 << (position & 7)
+        else:
+            self.flags[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+
+    def flag_mask(self):
+        """Boolean array over exam positions"""
+        bits = np.unpackbits(np.frombuffer(bytes(self.flags), dtype=np.uint8), bitorder='little')
+        return bits[:len(self)].astype(bool)
+
+
+class SessionStore:
+    """
+    Quiz sessions kept in memory, least recently used first out.
+
+    At most `max_sessions` are held; a session untouched for `ttl` seconds
+    is dropped. With a `db_path`, every change is also written to SQLite,
+    so sessions survive eviction from memory and server restarts until
+    their TTL runs out.
+
+    Without a database the sessions belong to one process, so several
+    server workers need a `db_path`: SQLite is then the source of truth
+    and get() always reads the session from it, since another worker may
+    have changed it. Each process opens its own connection on first use.
+    """
+
+    def __init__(self, max_sessions=10000, ttl=6 * 3600, db_path=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.db_path = db_path
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _connection(self):
+        """This process's database connection, or None without a database; call under the lock"""
+        if not self.db_path:
+            return None
+        # Opened lazily so a connection is never inherited across a fork
+        if self._pid != os.getpid():
+            # One connection shared by the request threads, always used under the lock
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def create(self, question_ids):
+        session = QuizSession(new_session_id(), question_ids)
+        with self._lock:
+            self._remember(session)
+            self._persist(session)
+            conn = self._connection()
+            if conn is not None:
+                # Sessions that expired while out of memory are only ever removed here
+                with conn:
+                    conn.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+        return session
+
+    def get(self, session_id):
+        """The session with this id, or None if it is unknown or expired"""
+        now = time.time()
+        with self._lock:
+            if self.db_path:
+                # Another worker may have changed the session; the database has the latest version
+                session = self._load(session_id)
+                if session is None:
+                    self._sessions.pop(session_id, None)
+                    return None
+                self._remember(session)
+                return session
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._load(session_id)
+                if session is None:
+                    return None
+                self._remember(session)
+            elif now - session.updated > self.ttl:
+                self._drop(session_id)
+                self.expirations += 1
+                return None
+            else:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def save(self, session):
+        """Record a change to a session obtained from get()"""
+        session.updated = time.time()
+        with self._lock:
+            if session.id in self._sessions:
+                self._sessions.move_to_end(session.id)
+            else:
+                self._remember(session)
+            self._persist(session)
+
+    def _remember(self, session):
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        # Least recently used sessions are at the front, so expired ones are too
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.updated >= cutoff:
+                break
+            # Only forgotten here: with a database, another worker may have used it since
+            self._sessions.pop(oldest.id)
+            self.expirations += 1
+        while len(self._sessions) > self.max_sessions:
+            # Still in the database (if any), so it can be resumed later
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _drop(self, session_id):
+        self._sessions.pop(session_id, None)
+        conn = self._connection()
+        if conn is not None:
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def _persist(self, session):
+        conn = self._connection()
+        if conn is None:
+            return
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, question_ids, answers, flags, current, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.id, session.question_ids.tobytes(), bytes(session.answers), bytes(session.flags),
+                    session.current, session.created, session.updated,
+                ),
+            )
+
+    def _load(self, session_id):
+        conn = self._connection()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT question_ids, answers, flags, current, created, updated FROM sessions WHERE id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        question_ids, answers, flags, current, created, updated = row
+        if time.time() - updated > self.ttl:
+            self._drop(session_id)
+            self.expirations += 1
+            return None
+        return QuizSession(
+            session_id, np.frombuffer(question_ids, dtype=np.int64), answers, flags, current, created, updated
+        )
+
+    def stats(self):
+        return {
+            'sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'persistent': bool(self.db_path),
+        }
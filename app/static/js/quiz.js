@@ -2,9 +2,13 @@ document.addEventListener('DOMContentLoaded', function() {
     // Quiz state
     const state = {
         questions: [],
+        expectedTotal: null,
+        loadingDone: false,
         currentQuestionIndex: 0,
         score: 0,
         answers: [],
+        // Resolves to the server-side session id, or null when running without one
+        sessionReady: Promise.resolve(null),
         selectedOption: null,
         quizStarted: false,
         quizEnded: false,
@@ -36,6 +40,8 @@ document.addEventListener('DOMContentLoaded', function() {
         finalTotal: document.getElementById('final-total'),
         reviewBtn: document.getElementById('review-btn'),
         reviewList: document.getElementById('review-list'),
+        reviewFilters: document.getElementById('review-filters'),
+        reviewMore: document.getElementById('review-more'),
         timeTaken: document.getElementById('time-taken'),
         timer: document.getElementById('timer'),
         progressBar: document.getElementById('progress-bar'),
@@ -47,44 +53,168 @@ document.addEventListener('DOMContentLoaded', function() {
     const mode = urlParams.get('mode') || 'all';
     const limit = urlParams.get('limit') ? parseInt(urlParams.get('limit')) : null;
     
+    // The session id survives a refresh of this tab, so progress can be resumed
+    const sessionKey = `quizSession:${mode}:${limit || 'all'}`;
+    
+    // Review items are built this many at a time, as the list is scrolled
+    const REVIEW_BATCH_SIZE = 20;
+    
     // Timer variables
     let timerInterval;
     
     // Initialize the quiz
     function initQuiz() {
-        // Fetch questions based on mode
-        let url = '/api/questions';
+        const savedSessionId = sessionStorage.getItem(sessionKey);
+        if (savedSessionId) {
+            resumeSession(savedSessionId).catch(error => {
+                console.warn('Could not resume the quiz session, starting a new quiz:', error);
+                sessionStorage.removeItem(sessionKey);
+                newQuiz();
+            });
+            return;
+        }
+        newQuiz();
+    }
+    
+    function newQuiz() {
+        // Random mode samples a small exam server-side; the full bank is streamed
         if (mode === 'random' && limit) {
-            url += `?limit=${limit}`;
+            const created = createSession({ limit });
+            state.sessionReady = created.then(session => session.session_id);
+            created
+                .then(session => getJson(`/api/sessions/${session.session_id}/questions`))
+                .then(data => {
+                    state.questions = data;
+                    state.loadingDone = true;
+                    startQuiz();
+                })
+                .catch(handleLoadError);
+            return;
         }
         
-        fetch(url)
-            .then(response => response.json())
-            .then(data => {
-                state.questions = data;
-                updateQuizStatus();
-                loadQuestion();
-                startTimer();
-                state.quizStarted = true;
-                state.startTime = new Date();
-            })
+        // A whole-bank session lists the questions in the order they stream in
+        state.sessionReady = createSession({})
+            .then(session => session.session_id)
             .catch(error => {
-                console.error('Error loading questions:', error);
-                alert('Failed to load questions. Please try again.');
+                console.warn('Quiz session unavailable, progress will not survive a refresh:', error);
+                return null;
             });
-    }    // Update quiz status (question count, score)
+        streamQuestions('/api/questions?format=ndjson&answers=0')
+            .catch(handleLoadError);
+    }
+    
+    function createSession(options) {
+        return postJson('/api/sessions', options).then(session => {
+            sessionStorage.setItem(sessionKey, session.session_id);
+            return session;
+        });
+    }
+    
+    // Rebuild the quiz state from a server-side session after a refresh
+    async function resumeSession(sessionId) {
+        const session = await getJson(`/api/sessions/${sessionId}`);
+        const questions = await getJson(`/api/sessions/${sessionId}/questions`);
+        const byId = new Map(questions.map(question => [question.id, question]));
+        
+        // Questions dropped from the bank since the session started are skipped
+        session.question_ids.forEach((questionId, i) => {
+            const question = byId.get(questionId);
+            if (!question) return;
+            question.flagged = session.flagged[i];
+            if (session.answers[i]) {
+                question.correct_answer = session.correct_answers[i];
+                state.answers.push({
+                    position: state.questions.length,
+                    questionId: questionId,
+                    selectedOption: session.answers[i],
+                    correctOption: session.correct_answers[i],
+                    isCorrect: session.answers[i] === session.correct_answers[i]
+                });
+            }
+            state.questions.push(question);
+        });
+        
+        state.sessionReady = Promise.resolve(sessionId);
+        state.score = session.score;
+        state.loadingDone = true;
+        state.currentQuestionIndex = Math.min(session.current, state.questions.length);
+        
+        const startTime = new Date(session.created * 1000);
+        if (state.currentQuestionIndex >= state.questions.length) {
+            state.startTime = startTime;
+            endQuiz();
+        } else {
+            startQuiz(startTime);
+        }
+    }
+    
+    // Start the quiz once the first question is available
+    function startQuiz(startTime) {
+        state.quizStarted = true;
+        state.startTime = startTime || new Date();
+        updateQuizStatus();
+        loadQuestion();
+        startTimer();
+    }
+    
+    function handleLoadError(error) {
+        console.error('Error loading questions:', error);
+        alert('Failed to load questions. Please try again.');
+    }
+    
+    // Read an NDJSON response line by line, showing question 1 as soon as it arrives
+    async function streamQuestions(url) {
+        const response = await fetch(url, { headers: { 'Accept': 'application/x-ndjson' } });
+        state.expectedTotal = parseInt(response.headers.get('X-Total-Count')) || null;
+        
+        const addLine = line => {
+            if (!line.trim()) return;
+            state.questions.push(JSON.parse(line));
+            if (!state.quizStarted) {
+                startQuiz();
+            } else {
+                elements.totalQuestions.textContent = state.expectedTotal || state.questions.length;
+            }
+        };
+        
+        if (!response.body || !window.TextDecoder) {
+            // Older browsers: fall back to reading the whole body
+            (await response.text()).split('\n').forEach(addLine);
+        } else {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                lines.forEach(addLine);
+            }
+            addLine(buffered + decoder.decode());
+        }
+        
+        state.loadingDone = true;
+        state.expectedTotal = state.questions.length;
+        updateQuizStatus();
+    }
+    
+    // Update quiz status (question count, score)
     function updateQuizStatus() {
+        // While the bank is still streaming in, show the advertised total
+        const totalQuestions = state.expectedTotal || state.questions.length;
         elements.currentQuestion.textContent = state.currentQuestionIndex + 1;
-        elements.totalQuestions.textContent = state.questions.length;
+        elements.totalQuestions.textContent = totalQuestions;
         elements.scoreElement.textContent = state.score;
         
         // Update progress data
-        state.progressData.remaining = state.questions.length - state.answers.length;
+        state.progressData.remaining = totalQuestions - state.answers.length;
         state.progressData.correct = state.score;
         state.progressData.incorrect = state.answers.length - state.score;
         
         // Update progress bar
-        const progressPercent = ((state.currentQuestionIndex + 1) / state.questions.length) * 100;
+        const progressPercent = ((state.currentQuestionIndex + 1) / totalQuestions) * 100;
         elements.progressBar.style.width = `${progressPercent}%`;
         
         // Update progress percentage text
@@ -162,6 +292,12 @@ document.addEventListener('DOMContentLoaded', function() {
         const isFlagged = question.flagged;
         elements.flagBtn.classList.toggle('active', isFlagged);
         elements.flagBtn.innerHTML = isFlagged ? '🚩 Unflag question' : '🚩 Flag for review';
+        
+        state.sessionReady.then(sessionId => {
+            if (!sessionId) return;
+            postJson(`/api/sessions/${sessionId}/flags`, { question_id: question.id, flagged: isFlagged })
+                .catch(error => console.error('Error saving flag:', error));
+        });
     }
     
     // Handle option selection
@@ -183,13 +319,68 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         const currentQuestion = state.questions[state.currentQuestionIndex];
-        const isCorrect = state.selectedOption === currentQuestion.correct_answer;
         
-        // Save the answer
+        // Answers aren't shipped with the questions; the server grades them
+        elements.submitBtn.disabled = true;
+        checkAnswer(currentQuestion.id, state.selectedOption)
+            .then(result => {
+                currentQuestion.correct_answer = result.correct_answer;
+                recordAnswer(currentQuestion, result.correct);
+            })
+            .catch(error => {
+                console.error('Error checking answer:', error);
+                alert('Failed to check your answer. Please try again.');
+            })
+            .finally(() => {
+                elements.submitBtn.disabled = false;
+            });
+    }
+    
+    // Grade one answer, recording it in the session when there is one
+    function checkAnswer(questionId, answer) {
+        return state.sessionReady.then(sessionId => {
+            if (!sessionId) {
+                return gradeAnswers([{ question_id: questionId, answer }]).then(([result]) => result);
+            }
+            return postJson(`/api/sessions/${sessionId}/answers`, { question_id: questionId, answer })
+                .catch(error => {
+                    // Expired or evicted: carry on without server-side progress
+                    console.warn('Quiz session lost, grading without it:', error);
+                    sessionStorage.removeItem(sessionKey);
+                    state.sessionReady = Promise.resolve(null);
+                    return checkAnswer(questionId, answer);
+                });
+        });
+    }
+    
+    // Grade a batch of {question_id, answer} records in one round trip
+    function gradeAnswers(answers) {
+        return postJson('/api/answers', { answers }).then(data => data.results);
+    }
+    
+    function getJson(url) {
+        return fetch(url).then(parseJsonResponse);
+    }
+    
+    function postJson(url, body) {
+        return fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        }).then(parseJsonResponse);
+    }
+    
+    function parseJsonResponse(response) {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+    }
+    
+    // Save a graded answer and show the outcome
+    function recordAnswer(currentQuestion, isCorrect) {
+        // Save the answer; the question itself stays in state.questions
         state.answers.push({
+            position: state.currentQuestionIndex,
             questionId: currentQuestion.id,
-            question: currentQuestion.question,
-            options: currentQuestion.options,
             selectedOption: state.selectedOption,
             correctOption: currentQuestion.correct_answer,
             isCorrect: isCorrect
@@ -242,6 +433,12 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Move to the next question
     function nextQuestion() {
+        if (state.currentQuestionIndex + 1 >= state.questions.length && !state.loadingDone) {
+            // The next question hasn't streamed in yet; try again shortly
+            setTimeout(nextQuestion, 100);
+            return;
+        }
+        
         state.currentQuestionIndex++;
         
         if (state.currentQuestionIndex >= state.questions.length) {
@@ -259,6 +456,9 @@ document.addEventListener('DOMContentLoaded', function() {
         // Stop the timer
         clearInterval(timerInterval);
         
+        // A refresh from here on starts a new quiz
+        sessionStorage.removeItem(sessionKey);
+        
         // Calculate time taken
         const timeDiff = state.endTime - state.startTime; // in milliseconds
         const minutes = Math.floor(timeDiff / 60000);
@@ -308,107 +508,155 @@ document.addEventListener('DOMContentLoaded', function() {
         hideElement(elements.questionContainer);
         showElement(elements.resultsContainer);
     }
-      // Show the review screen
+    // Show the review screen
     function showReview() {
-        hideElement(elements.resultsContainer);
-        showElement(elements.reviewContainer);
+        // The review lists are fixed once the quiz is over, so index them once
+        if (!state.review) {
+            state.review = buildReviewIndex();
+        }
+        
+        // Flagged but unanswered questions still need their answer key
+        const missing = state.review.flagged
+            .map(position => state.questions[position])
+            .filter(q => !q.correct_answer);
+        if (missing.length === 0) {
+            renderReview();
+            return;
+        }
         
-        // Clear previous review
-        elements.reviewList.innerHTML = '';
+        gradeAnswers(missing.map(q => ({ question_id: q.id, answer: null })))
+            .then(results => {
+                results.forEach((result, i) => {
+                    missing[i].correct_answer = result.correct_answer;
+                });
+            })
+            .catch(error => console.error('Error loading answer key:', error))
+            .finally(renderReview);
+    }
+    
+    // Question positions for each review filter, plus answers by position
+    function buildReviewIndex() {
+        const answerByPosition = new Map();
+        const answered = [];
+        const incorrect = [];
+        state.answers.forEach(answer => {
+            answerByPosition.set(answer.position, answer);
+            answered.push(answer.position);
+            if (!answer.isCorrect) incorrect.push(answer.position);
+        });
         
-        // Count flagged questions
-        const flaggedQuestions = state.questions.filter(q => q.flagged).length;
+        const flagged = [];
+        state.questions.forEach((question, position) => {
+            if (question.flagged) flagged.push(position);
+        });
         
-        // Add a flagged questions section if there are any
-        if (flaggedQuestions > 0) {
-            const flaggedSection = document.createElement('div');
-            flaggedSection.classList.add('review-section');
-            flaggedSection.innerHTML = `
-                <h3>Flagged Questions (${flaggedQuestions})</h3>
-            `;
-            elements.reviewList.appendChild(flaggedSection);
-            
-            // Add flagged questions
-            state.questions.forEach((question, index) => {
-                if (!question.flagged) return;
-                
-                // Find the corresponding answer if it exists
-                const answer = state.answers.find(a => a.questionId === question.id);
-                const isAnswered = !!answer;
-                
-                const reviewItem = document.createElement('div');
-                reviewItem.classList.add('review-item', 'flagged');
-                if (isAnswered) {
-                    reviewItem.classList.add(answer.isCorrect ? 'correct' : 'incorrect');
-                }
-                
-                reviewItem.innerHTML = `
-                    <div class="question-number">Question ${index + 1} (ID: ${question.id}) ${isAnswered ? '' : '- Not answered'}</div>
-                    <div class="question-text">${question.question}</div>
-                    <div class="options-review">
-                        ${Object.entries(question.options).map(([letter, text]) => `
-                            <div class="option ${isAnswered && letter === question.correct_answer ? 'correct' : ''} ${isAnswered && letter === answer.selectedOption && letter !== question.correct_answer ? 'incorrect' : ''}">
-                                <div class="option-letter">${letter}</div>
-                                <div class="option-text">${text}</div>
-                            </div>
-                        `).join('')}
-                    </div>
-                    ${isAnswered ? `
-                        <div class="review-answer">
-                            Your answer: ${answer.selectedOption} - ${answer.isCorrect ? 'Correct' : 'Incorrect'}
-                            ${!answer.isCorrect ? `<p>Correct answer: ${answer.correctOption}</p>` : ''}
-                        </div>
-                    ` : `
-                        <div class="review-answer">
-                            <p>Correct answer: ${question.correct_answer}</p>
-                        </div>
-                    `}
-                `;
-                
-                elements.reviewList.appendChild(reviewItem);
-            });
+        return {
+            answerByPosition,
+            lists: { answered, incorrect, flagged },
+            flagged,
+            filter: flagged.length > 0 ? 'flagged' : 'answered',
+            rendered: 0,
+            observer: null
+        };
+    }
+    
+    function renderReview() {
+        hideElement(elements.resultsContainer);
+        showElement(elements.reviewContainer);
+        
+        const review = state.review;
+        elements.reviewFilters.querySelectorAll('[data-filter]').forEach(button => {
+            const filter = button.dataset.filter;
+            button.querySelector('.count').textContent = review.lists[filter].length;
+            button.onclick = () => setReviewFilter(filter);
+        });
+        elements.reviewMore.onclick = renderReviewBatch;
+        
+        // Build the next batch whenever the "more" button scrolls into view
+        if (!review.observer && window.IntersectionObserver) {
+            review.observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) renderReviewBatch();
+            }, { rootMargin: '600px 0px' });
+            review.observer.observe(elements.reviewMore);
         }
         
-        // Add a section for all questions
-        const allQuestionsSection = document.createElement('div');
-        allQuestionsSection.classList.add('review-section');
-        allQuestionsSection.innerHTML = `
-            <h3>All Answered Questions (${state.answers.length})</h3>
-        `;
-        elements.reviewList.appendChild(allQuestionsSection);
+        setReviewFilter(review.filter);
+    }
+    
+    function setReviewFilter(filter) {
+        const review = state.review;
+        review.filter = filter;
+        review.rendered = 0;
+        elements.reviewFilters.querySelectorAll('[data-filter]').forEach(button => {
+            button.classList.toggle('active', button.dataset.filter === filter);
+        });
+        elements.reviewList.textContent = '';
+        renderReviewBatch();
+    }
+    
+    // Append the next few items of the current filter instead of the whole list at once
+    function renderReviewBatch() {
+        const review = state.review;
+        const list = review.lists[review.filter];
+        const end = Math.min(review.rendered + REVIEW_BATCH_SIZE, list.length);
+        
+        const fragment = document.createDocumentFragment();
+        for (let i = review.rendered; i < end; i++) {
+            fragment.appendChild(renderReviewItem(list[i], review.answerByPosition.get(list[i])));
+        }
+        elements.reviewList.appendChild(fragment);
+        review.rendered = end;
         
-        // Add each answered question to the review list
-        state.answers.forEach((answer, index) => {
-            const reviewItem = document.createElement('div');
-            reviewItem.classList.add('review-item');
+        if (list.length === 0) {
+            elements.reviewList.innerHTML = '<p class="review-empty">No questions to show.</p>';
+        }
+        elements.reviewMore.classList.toggle('hidden', end >= list.length);
+    }
+    
+    function renderReviewItem(position, answer) {
+        const question = state.questions[position];
+        const isAnswered = !!answer;
+        const correctOption = isAnswered ? answer.correctOption : question.correct_answer;
+        
+        const reviewItem = document.createElement('div');
+        reviewItem.classList.add('review-item');
+        if (question.flagged) {
+            reviewItem.classList.add('flagged');
+        }
+        if (isAnswered) {
             reviewItem.classList.add(answer.isCorrect ? 'correct' : 'incorrect');
-            
-            reviewItem.innerHTML = `
-                <div class="question-number">Question ${index + 1} (ID: ${answer.questionId})</div>
-                <div class="question-text">${answer.question}</div>
-                <div class="options-review">
-                    ${Object.entries(answer.options).map(([letter, text]) => `
-                        <div class="option ${letter === answer.correctOption ? 'correct' : ''} ${letter === answer.selectedOption && letter !== answer.correctOption ? 'incorrect' : ''}">
-                            <div class="option-letter">${letter}</div>
-                            <div class="option-text">${text}</div>
-                        </div>
-                    `).join('')}
-                </div>
+        }
+        
+        reviewItem.innerHTML = `
+            <div class="question-number">Question ${position + 1} (ID: ${question.id}) ${isAnswered ? '' : '- Not answered'}</div>
+            <div class="question-text">${question.question}</div>
+            <div class="options-review">
+                ${Object.entries(question.options).map(([letter, text]) => `
+                    <div class="option ${isAnswered && letter === correctOption ? 'correct' : ''} ${isAnswered && letter === answer.selectedOption && letter !== correctOption ? 'incorrect' : ''}">
+                        <div class="option-letter">${letter}</div>
+                        <div class="option-text">${text}</div>
+                    </div>
+                `).join('')}
+            </div>
+            ${isAnswered ? `
                 <div class="review-answer">
                     Your answer: ${answer.selectedOption} - ${answer.isCorrect ? 'Correct' : 'Incorrect'}
-                    ${!answer.isCorrect ? `<p>Correct answer: ${answer.correctOption}</p>` : ''}
+                    ${!answer.isCorrect ? `<p>Correct answer: ${correctOption}</p>` : ''}
                 </div>
-            `;
-            
-            elements.reviewList.appendChild(reviewItem);
-        });
+            ` : `
+                <div class="review-answer">
+                    <p>Correct answer: ${correctOption}</p>
+                </div>
+            `}
+        `;
+        return reviewItem;
     }
     
     // Start timer function
     function startTimer() {
-        let seconds = 0;
         timerInterval = setInterval(() => {
-            seconds++;
+            // Counted from the start time, which a resumed session carries over
+            const seconds = Math.floor((new Date() - state.startTime) / 1000);
             const minutes = Math.floor(seconds / 60);
             const remainingSeconds = seconds % 60;
             elements.timer.textContent = `Time: ${minutes.toString().padStart(2, '0')}:${remainingSeconds.toString().padStart(2, '0')}`;
@@ -460,7 +708,7 @@ Question Details:
 ----------------
 ${state.answers.map((answer, index) => `
 Question ${index + 1} (ID: ${answer.questionId}):
-${answer.question.substring(0, 100)}...
+${state.questions[answer.position].question.substring(0, 100)}...
 Your Answer: ${answer.selectedOption} (${answer.isCorrect ? 'Correct' : 'Incorrect'})
 ${!answer.isCorrect ? `Correct Answer: ${answer.correctOption}` : ''}
 `).join('\n')}
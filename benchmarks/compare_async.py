@@ -0,0 +1,199 @@
+# Compare the sync (gunicorn) and asyncio (aiohttp) servers with 1k+ slow
+# streaming clients holding connections while other clients make quick requests
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'data'))
+
+from generate_questions import iter_synthetic_questions, write_questions
+from run_benchmarks import RESULTS_DIR, git_commit
+
+SERVERS = ('sync', 'async')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, bank_path, workers, threads):
+    env = dict(os.environ, HOST='127.0.0.1', PORT=str(port), QUESTIONS_PATH=bank_path, DEBUG='False',
+               SERVER='gunicorn', WORKERS=str(workers), THREADS=str(threads))
+    # The asyncio variant only serves the read API, so it isn't a run.py mode
+    script = os.path.join(ROOT_DIR, 'run.py' if kind == 'sync' else os.path.join('app', 'async_app.py'))
+    process = subprocess.Popen([sys.executable, script], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def slow_stream(port, stop_at, read_interval, ttfb, failures):
+    """Read /api/questions as NDJSON in small pieces, like a slow mobile client"""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket()
+    # A small receive window makes the server block (or buffer) on this connection
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    writer = None
+    try:
+        start = time.perf_counter()
+        await loop.sock_connect(sock, ('127.0.0.1', port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+        writer.write(b"GET /api/questions?format=ndjson&answers=0 HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        first = await asyncio.wait_for(reader.read(4096), timeout=max(stop_at - time.perf_counter(), 0.1))
+        if not first:
+            failures.append('closed')
+            return
+        ttfb.append(time.perf_counter() - start)
+        while time.perf_counter() < stop_at:
+            await asyncio.sleep(read_interval)
+            if not await reader.read(4096):
+                break
+    except (OSError, asyncio.TimeoutError) as e:
+        failures.append(type(e).__name__)
+    finally:
+        if writer is not None:
+            writer.close()
+        else:
+            sock.close()
+
+
+async def quick_requests(session, base_url, bank_size, stop_at, latencies, failures, rng):
+    """Back-to-back small requests: one question, or a 20-question quiz"""
+    while time.perf_counter() < stop_at:
+        if rng.random() < 0.5:
+            path = f"/api/question/{rng.randint(1, bank_size)}"
+        else:
+            path = "/api/questions?limit=20&answers=0"
+        start = time.perf_counter()
+        try:
+            async with session.get(base_url + path) as response:
+                await response.read()
+                if response.status != 200:
+                    failures.append(response.status)
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            failures.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def drive(port, args):
+    stop_at = time.perf_counter() + args.duration
+    base_url = f"http://127.0.0.1:{port}"
+    ttfb, stream_failures, latencies, failures = [], [], [], []
+    rng = random.Random(0)
+
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        streams = [
+            asyncio.create_task(slow_stream(port, stop_at, args.read_interval, ttfb, stream_failures))
+            for _ in range(args.slow_clients)
+        ]
+        # Let the slow clients occupy the server first
+        await asyncio.sleep(min(1.0, args.duration / 4))
+        quick_start = time.perf_counter()
+        quick = [
+            asyncio.create_task(quick_requests(session, base_url, args.bank_size, stop_at, latencies, failures, rng))
+            for _ in range(args.quick_clients)
+        ]
+        await asyncio.gather(*quick, *streams)
+        quick_elapsed = time.perf_counter() - quick_start
+
+    return {
+        'slow_clients': args.slow_clients,
+        'slow_streams_started': len(ttfb),
+        'slow_stream_failures': len(stream_failures),
+        'stream_ttfb_p50_ms': (percentile(ttfb, 0.5) or 0) * 1000,
+        'stream_ttfb_p99_ms': (percentile(ttfb, 0.99) or 0) * 1000,
+        'quick_clients': args.quick_clients,
+        'quick_requests': len(latencies),
+        'quick_failures': len(failures),
+        'quick_rps': len(latencies) / quick_elapsed,
+        'quick_p50_ms': (percentile(latencies, 0.5) or 0) * 1000,
+        'quick_p95_ms': (percentile(latencies, 0.95) or 0) * 1000,
+        'quick_p99_ms': (percentile(latencies, 0.99) or 0) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sync and async servers under many slow connections')
+    parser.add_argument('--servers', default='sync,async', help='comma-separated: sync, async')
+    parser.add_argument('--slow-clients', type=int, default=1000, help='clients holding an NDJSON stream open')
+    parser.add_argument('--quick-clients', type=int, default=50, help='clients making back-to-back small requests')
+    parser.add_argument('--read-interval', type=float, default=0.5, help='seconds between 4 KB reads of a slow client')
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--request-timeout', type=float, default=10.0)
+    parser.add_argument('--bank-size', type=int, default=5720)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for the sync server')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/async-<time>-<commit>.json)')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        bank_path = os.path.join(directory, 'bank.json')
+        write_questions(iter_synthetic_questions(args.bank_size, seed=0), bank_path)
+        for kind in args.servers.split(','):
+            port = free_port()
+            process = start_server(kind, port, bank_path, args.workers, args.threads)
+            try:
+                result = asyncio.run(drive(port, args))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            result['server'] = kind if kind == 'async' else f"sync ({args.workers}x{args.threads} threads)"
+            results.append(result)
+            print(f"{result['server']:24s} quick {result['quick_rps']:8.1f} req/s  "
+                  f"p50 {result['quick_p50_ms']:8.1f} ms  p99 {result['quick_p99_ms']:8.1f} ms  "
+                  f"failures {result['quick_failures']:5d} | streams started {result['slow_streams_started']:5d}"
+                  f"/{args.slow_clients}  ttfb p99 {result['stream_ttfb_p99_ms']:8.1f} ms")
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'cpu_count': os.cpu_count(),
+        'params': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"async-{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
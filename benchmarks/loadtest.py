@@ -0,0 +1,248 @@
+# Load test: start the API from run.py and drive a mix of requests from several
+# processes over keep-alive connections, reporting throughput and latency as JSON
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'data'))
+
+from compare_async import free_port, percentile, start_server
+from generate_questions import iter_synthetic_questions, write_questions
+from run_benchmarks import RESULTS_DIR, git_commit
+
+DEFAULT_BANK = os.path.join(ROOT_DIR, 'data', 'az104_questions.json')
+
+# Request kinds a mix can weight
+KINDS = ('full', 'limit', 'single')
+
+# Pause before reconnecting after a failed request, so a down server isn't hammered
+RECONNECT_DELAY = 0.1
+
+
+def parse_mix(text):
+    """'full=1,limit=4,single=5' -> {'full': 1.0, 'limit': 4.0, 'single': 5.0}"""
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"unknown request kind {kind!r} (expected one of {', '.join(KINDS)})")
+        mix[kind] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('the mix needs at least one positive weight')
+    return mix
+
+
+def parse_url(text):
+    """'host:port' or 'http://host:port' -> ('host', port)"""
+    parts = urlsplit(text if '//' in text else '//' + text)
+    if parts.scheme not in ('', 'http') or not parts.hostname or parts.port is None:
+        raise argparse.ArgumentTypeError(f"expected host:port or http://host:port, got {text!r}")
+    return parts.hostname, parts.port
+
+
+def request_path(kind, rng, question_ids, limit):
+    if kind == 'full':
+        return '/api/questions'
+    if kind == 'limit':
+        return f'/api/questions?limit={limit}&answers=0'
+    return f'/api/question/{rng.choice(question_ids)}'
+
+
+def connection_loop(host, port, job, seed, results):
+    """One keep-alive connection making back-to-back requests until the job's stop time"""
+    rng = random.Random(seed)
+    kinds = list(job['mix'])
+    weights = [job['mix'][kind] for kind in kinds]
+    headers = {'Accept-Encoding': job['accept_encoding']} if job['accept_encoding'] else {}
+    connection = http.client.HTTPConnection(host, port, timeout=job['timeout'])
+    while time.time() < job['start_at']:
+        time.sleep(0.01)
+    while time.time() < job['stop_at']:
+        kind = rng.choices(kinds, weights)[0]
+        path = request_path(kind, rng, job['question_ids'], job['limit'])
+        stats = results[kind]
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            stats['errors'] += 1
+            connection.close()
+            time.sleep(RECONNECT_DELAY)
+            connection = http.client.HTTPConnection(host, port, timeout=job['timeout'])
+            continue
+        if response.status != 200:
+            stats['errors'] += 1
+            continue
+        stats['latencies'].append(time.perf_counter() - start)
+        stats['bytes'] += len(body)
+    connection.close()
+
+
+def run_process(host, port, job, index):
+    """Client process: `connections` threads, each with its own connection"""
+    # Each thread gets its own counters; they are merged when all are done
+    per_thread = [
+        {kind: {'latencies': [], 'bytes': 0, 'errors': 0} for kind in job['mix']}
+        for _ in range(job['connections'])
+    ]
+    threads = [
+        threading.Thread(target=connection_loop, args=(host, port, job, index * 1000 + i, per_thread[i]))
+        for i in range(job['connections'])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results = {kind: {'latencies': [], 'bytes': 0, 'errors': 0} for kind in job['mix']}
+    for thread_results in per_thread:
+        for kind, stats in thread_results.items():
+            results[kind]['latencies'] += stats['latencies']
+            results[kind]['bytes'] += stats['bytes']
+            results[kind]['errors'] += stats['errors']
+    return results
+
+
+def fetch_question_ids(host, port, timeout):
+    """Ids of the bank a running server serves, so single requests ask for questions it has"""
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request('GET', '/api/questions?answers=0')
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise SystemExit(f"GET /api/questions on {host}:{port} returned {response.status}")
+    return [question['id'] for question in json.loads(body)]
+
+
+def summarize(latencies, total_bytes, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': (percentile(latencies, 0.5) or 0) * 1000,
+        'p95_ms': (percentile(latencies, 0.95) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 0.99) or 0) * 1000,
+        'bytes_per_sec': total_bytes / elapsed,
+    }
+
+
+def load_test(host, port, question_ids, args):
+    job = {
+        'mix': args.mix,
+        'limit': args.limit,
+        'question_ids': question_ids,
+        'accept_encoding': args.accept_encoding,
+        'timeout': args.request_timeout,
+        'connections': args.connections,
+    }
+    # Every process starts together after a short delay and stops at the same time
+    job['start_at'] = time.time() + 1.0
+    job['stop_at'] = job['start_at'] + args.duration
+
+    with multiprocessing.Pool(args.processes) as pool:
+        outcomes = pool.starmap(run_process, [(host, port, job, i) for i in range(args.processes)])
+
+    by_kind = {}
+    all_latencies, all_bytes, all_errors = [], 0, 0
+    for kind in args.mix:
+        latencies = [value for outcome in outcomes for value in outcome[kind]['latencies']]
+        total_bytes = sum(outcome[kind]['bytes'] for outcome in outcomes)
+        errors = sum(outcome[kind]['errors'] for outcome in outcomes)
+        by_kind[kind] = summarize(latencies, total_bytes, errors, args.duration)
+        all_latencies += latencies
+        all_bytes += total_bytes
+        all_errors += errors
+    return {'total': summarize(all_latencies, all_bytes, all_errors, args.duration), 'by_kind': by_kind}
+
+
+def print_summary(result):
+    rows = [('total', result['total'])] + sorted(result['by_kind'].items())
+    print(f"{'kind':8s} {'requests':>9s} {'errors':>7s} {'req/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'MB/s':>8s}")
+    for kind, stats in rows:
+        print(f"{kind:8s} {stats['requests']:9d} {stats['errors']:7d} {stats['rps']:9.1f} {stats['p50_ms']:8.2f} "
+              f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} {stats['bytes_per_sec'] / 1e6:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the question API started from run.py')
+    parser.add_argument('--server', choices=('sync', 'async'), default='sync',
+                        help='gunicorn server from run.py (sync) or the asyncio read API, app/async_app.py (async)')
+    parser.add_argument('--url', type=parse_url,
+                        help='test an already running server (host:port or http://host:port) instead of starting one')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('full=1,limit=4,single=5'),
+                        help='weighted request kinds: full (whole bank), limit (sampled quiz), single (one question)')
+    parser.add_argument('--limit', type=int, default=20, help='questions per limit= request')
+    parser.add_argument('--bank-size', type=int, help='serve a synthetic bank of this size instead of the shipped one')
+    parser.add_argument('--processes', type=int, default=max(1, (os.cpu_count() or 2) // 2), help='client processes')
+    parser.add_argument('--connections', type=int, default=8, help='keep-alive connections per client process')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load')
+    parser.add_argument('--accept-encoding', default='gzip', help="Accept-Encoding to send ('' for none)")
+    parser.add_argument('--request-timeout', type=float, default=30.0)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for the sync server')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/loadtest-<time>-<commit>.json)')
+    args = parser.parse_args()
+    if args.url and args.bank_size:
+        parser.error('--bank-size only applies to a server started by the load test, not --url')
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        if args.url:
+            host, port = args.url
+            # The target may serve another bank than the local one
+            question_ids = fetch_question_ids(host, port, args.request_timeout)
+        else:
+            bank_path = DEFAULT_BANK
+            if args.bank_size:
+                bank_path = os.path.join(directory, 'bank.json')
+                write_questions(iter_synthetic_questions(args.bank_size, seed=0), bank_path)
+            with open(bank_path, encoding='utf-8') as f:
+                question_ids = [question['id'] for question in json.load(f)]
+            host, port = '127.0.0.1', free_port()
+            process = start_server(args.server, port, bank_path, args.workers, args.threads)
+        try:
+            result = load_test(host, port, question_ids, args)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    print_summary(result)
+
+    commit = git_commit()
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'url')}
+    params['target'] = f'{host}:{port}' if args.url else f"run.py ({args.server})"
+    params['questions'] = len(question_ids)
+    report = {
+        'commit': commit,
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+        'results': result,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"loadtest-{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
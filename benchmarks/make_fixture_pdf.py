@@ -0,0 +1,95 @@
+# Generate the PDF fixture the benchmarks extract from: synthetic questions laid
+# out like the exam dumps ("Question: N", watermark, wrapped text, options, answer)
+import argparse
+import os
+import sys
+import textwrap
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+
+from generate_questions import iter_synthetic_questions
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DEFAULT_FIXTURE = os.path.join(FIXTURE_DIR, 'az104_fixture.pdf')
+
+LINES_PER_PAGE = 52
+LINE_WIDTH = 95
+
+
+def question_lines(q, number):
+    lines = [f"Question: {number}", "Certy IQ"]
+    lines += textwrap.wrap(q['question'], LINE_WIDTH)
+    for letter, text in q['options'].items():
+        lines += textwrap.wrap(f"{letter}. {text}", LINE_WIDTH)
+    lines.append(f"Answer: {q['correct_answer']}")
+    lines.append("Explanation:")
+    lines += textwrap.wrap(f"Reference: https://learn.microsoft.com/en-us/azure/ topic {q['topic']}.", LINE_WIDTH)
+    lines.append("")
+    return lines
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(pages, path):
+    """
+    Write a minimal PDF: one Helvetica text stream per page, Flate-compressed
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = ' '.join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode('ascii'))
+    font_id = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        content = "BT /F1 10 Tf 14 TL 40 770 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        data = zlib.compress(content.encode('latin-1', 'replace'), 9)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode('ascii')
+        )
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def make_fixture(path=DEFAULT_FIXTURE, num_questions=300, seed=0):
+    """Lay out `num_questions` synthetic questions over as many pages as they need"""
+    pages, page = [], []
+    for number, q in enumerate(iter_synthetic_questions(num_questions, seed), 1):
+        for line in question_lines(q, number):
+            page.append(line)
+            if len(page) == LINES_PER_PAGE:
+                pages.append(page)
+                page = []
+    if page:
+        pages.append(page)
+    write_pdf(pages, path)
+    return len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the benchmark PDF fixture')
+    parser.add_argument('--output', default=DEFAULT_FIXTURE)
+    parser.add_argument('--questions', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    num_pages = make_fixture(args.output, args.questions, args.seed)
+    print(f"Wrote {args.questions} questions on {num_pages} pages to {args.output} "
+          f"({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
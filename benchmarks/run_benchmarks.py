@@ -0,0 +1,216 @@
+# Benchmark the API hot paths and the PDF extraction pipeline, writing results as JSON
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'data'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'app'))
+
+from columnar_store import write_store
+from generate_questions import iter_synthetic_questions, write_questions
+from make_fixture_pdf import DEFAULT_FIXTURE, make_fixture
+from question_bank import QuestionBank
+from question_parser import parse_block
+from text_pipeline import QUESTION_MARKER, iter_page_texts, iter_question_blocks
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def measure(fn, min_time=1.0, min_iterations=3, max_iterations=100000, warmup=1):
+    """
+    Call `fn` until `min_time` seconds have passed (within the iteration
+    bounds) and summarize the per-call latencies
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_iterations and (len(times) < min_iterations or time.perf_counter() - start < min_time):
+        call_start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - call_start)
+    times.sort()
+    total = sum(times)
+    return {
+        'iterations': len(times),
+        'ops_per_sec': len(times) / total if total > 0 else float('inf'),
+        'mean_ms': total / len(times) * 1000,
+        'p50_ms': times[len(times) // 2] * 1000,
+        'p95_ms': times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+        'min_ms': times[0] * 1000,
+    }
+
+
+def write_bank(size, directory, fmt):
+    """Synthetic bank of `size` questions as JSON or as a compiled .qbank store"""
+    json_path = os.path.join(directory, f'bank_{size}.json')
+    if not os.path.exists(json_path):
+        write_questions(iter_synthetic_questions(size, seed=0), json_path)
+    if fmt == 'json':
+        return json_path
+    store_path = os.path.join(directory, f'bank_{size}.qbank')
+    with open(json_path, 'r') as f:
+        write_store(json.load(f), store_path)
+    return store_path
+
+
+def load_app(bank_path):
+    """Import (or re-import) app.py against the given bank"""
+    os.environ['QUESTIONS_PATH'] = bank_path
+    os.environ.pop('QUESTIONS_DB', None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if 'app' in sys.modules:
+            return importlib.reload(sys.modules['app'])
+        return importlib.import_module('app')
+
+
+def bench_api(size, fmt, directory, min_time):
+    bank_path = write_bank(size, directory, fmt)
+    params = {'bank_size': size, 'bank_format': fmt}
+    results = []
+
+    def record(name, stats, **extra):
+        results.append({'name': name, 'params': dict(params, **extra), **stats})
+
+    record('bank_load', measure(lambda: QuestionBank(bank_path).get(), min_time, warmup=0, max_iterations=20))
+
+    client = load_app(bank_path).app.test_client()
+    rng = random.Random(0)
+
+    def get(path, headers=None):
+        def call():
+            response = client.get(path(), headers=headers)
+            assert response.status_code == 200, (path(), response.status_code)
+            return response
+        return call
+
+    cases = [
+        ('api_questions_full', get(lambda: '/api/questions'), None),
+        ('api_questions_full_gzip', get(lambda: '/api/questions', {'Accept-Encoding': 'gzip'}), None),
+        ('api_questions_limit', get(lambda: '/api/questions?limit=20&answers=0'), {'limit': 20}),
+        ('api_questions_page', get(lambda: '/api/questions?offset=0&page_size=50'), {'page_size': 50}),
+        ('api_question_by_id', get(lambda: f'/api/question/{rng.randint(1, size)}'), None),
+    ]
+    for name, call, extra in cases:
+        stats = measure(call, min_time)
+        stats['response_bytes'] = len(call().data)
+        record(name, stats, **(extra or {}))
+    return results
+
+
+def bench_pdf(pdf_path, min_time):
+    results = []
+    params = {'fixture': os.path.basename(pdf_path)}
+
+    def extract(cache_path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return list(iter_page_texts(pdf_path, workers=1, progress_every=0, cache_path=cache_path))
+
+    texts = extract(None)
+    stats = measure(lambda: extract(None), min_time, warmup=0)
+    stats['pages_per_sec'] = stats['ops_per_sec'] * len(texts)
+    results.append({'name': 'pdf_extract_pages', 'params': dict(params, pages=len(texts), cache='off'), **stats})
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'page_cache.sqlite')
+        extract(cache_path)
+        stats = measure(lambda: extract(cache_path), min_time, warmup=0)
+        stats['pages_per_sec'] = stats['ops_per_sec'] * len(texts)
+        results.append({'name': 'pdf_extract_pages', 'params': dict(params, pages=len(texts), cache='warm'), **stats})
+
+    blocks = [block for _, block in iter_question_blocks(texts, QUESTION_MARKER)]
+    stats = measure(lambda: sum(1 for _ in iter_question_blocks(texts, QUESTION_MARKER)), min_time)
+    stats['blocks_per_sec'] = stats['ops_per_sec'] * len(blocks)
+    results.append({'name': 'segment_blocks', 'params': dict(params, blocks=len(blocks)), **stats})
+
+    stats = measure(lambda: [parse_block(block) for block in blocks], min_time)
+    stats['blocks_per_sec'] = stats['ops_per_sec'] * len(blocks)
+    results.append({'name': 'parse_blocks', 'params': dict(params, blocks=len(blocks)), **stats})
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def print_results(results, baseline=None):
+    previous = {result_key(r): r for r in (baseline or {}).get('results', [])}
+    for result in results:
+        params = ' '.join(f"{k}={v}" for k, v in result['params'].items())
+        line = f"{result['name']:26s} {params:44s} {result['ops_per_sec']:12.1f} ops/s  p50 {result['p50_ms']:9.3f} ms"
+        old = previous.get(result_key(result))
+        if old:
+            line += f"  ({result['ops_per_sec'] / old['ops_per_sec']:.2f}x vs {baseline.get('commit')})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the API and extraction benchmarks')
+    parser.add_argument('--sizes', default='572,5720,57200', help='comma-separated bank sizes')
+    parser.add_argument('--formats', default='json,qbank', help='bank formats to serve: json, qbank')
+    parser.add_argument('--pdf', default=DEFAULT_FIXTURE, help='PDF fixture for the extraction benchmarks')
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds spent on each case')
+    parser.add_argument('--only', choices=('api', 'pdf'), help='run one group only')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        make_fixture(args.pdf)
+
+    results = []
+    if args.only != 'pdf':
+        with tempfile.TemporaryDirectory() as directory:
+            for size in (int(s) for s in args.sizes.split(',')):
+                for fmt in args.formats.split(','):
+                    results += bench_api(size, fmt, directory, args.min_time)
+    if args.only != 'api':
+        results += bench_pdf(args.pdf, args.min_time)
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved {len(results)} results to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Micro-benchmark: question blocks parsed per second, old regex chain vs parse_block
+import argparse
+import random
+import re
+import time
+
+from question_parser import parse_block
+from text_pipeline import QUESTION_MARKER, iter_page_texts, iter_question_blocks
+
+def legacy_parse_block(block_text):
+    """
+    The per-block parsing pdf_parser.py did before question_parser existed:
+    separate regex passes for the answer, the options and the watermark
+    """
+    answer_match = re.search(r'[Aa]nswer:\s*([A-D])', block_text)
+    if not answer_match:
+        return None
+    options_sections = re.findall(r'([A-D])\.[\s\n]*(.*?)(?=[A-D]\.|\n[Aa]nswer:|$)', block_text, re.DOTALL)
+    options = {}
+    for opt_letter, opt_text in options_sections:
+        options[opt_letter] = opt_text.strip()
+    first_option_pos = block_text.find('A.')
+    if first_option_pos == -1:
+        first_option_pos = block_text.find('A\n')
+    if first_option_pos > 0:
+        question_text = block_text[:first_option_pos].strip()
+    else:
+        question_text = block_text[:len(block_text)//3].strip()
+    question_text = re.sub(r'Certy\s*IQ', '', question_text).strip()
+    return question_text, options, answer_match.group(1)
+
+def synthetic_blocks(count, seed=0):
+    """
+    Blocks shaped like the PDF's: watermark, a few question lines, options, answer, explanation
+    """
+    rng = random.Random(seed)
+    words = ('Azure', 'subscription', 'virtual', 'network', 'storage', 'account', 'resource',
+             'group', 'policy', 'subnet', 'gateway', 'backup', 'vault', 'role', 'tenant')
+    def sentence(n):
+        return ' '.join(rng.choice(words) for _ in range(n)).capitalize() + '.'
+    blocks = []
+    for _ in range(count):
+        letters = 'ABCDEF'[:rng.randint(3, 5)]
+        lines = ['Certy IQ']
+        lines += [sentence(rng.randint(8, 20)) for _ in range(rng.randint(2, 6))]
+        lines.append('What should you do?')
+        lines += [f'{letter}. {sentence(rng.randint(3, 12))}' for letter in letters]
+        lines.append(f'Answer: {rng.choice(letters[:4])}')
+        lines.append(f'Explanation: {sentence(rng.randint(10, 40))}')
+        lines.append('Reference: https://learn.microsoft.com/en-us/azure/')
+        blocks.append('\n'.join(lines))
+    return blocks
+
+def time_parser(parse, blocks, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for block in blocks:
+            parse(block)
+        best = min(best, time.perf_counter() - start_time)
+    return len(blocks) / best
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare question block parsing throughput')
+    parser.add_argument('--pdf', help='parse the blocks of this PDF instead of synthetic ones')
+    parser.add_argument('--blocks', type=int, default=5000, help='number of synthetic blocks')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per parser; the best one counts')
+    args = parser.parse_args()
+
+    if args.pdf:
+        texts = iter_page_texts(args.pdf, progress_every=0)
+        blocks = [block.strip() for _, block in iter_question_blocks(texts, QUESTION_MARKER)]
+    else:
+        blocks = synthetic_blocks(args.blocks)
+    print(f"{len(blocks)} blocks, {sum(map(len, blocks))} characters")
+
+    legacy_rate = time_parser(legacy_parse_block, blocks, args.repeat)
+    rate = time_parser(parse_block, blocks, args.repeat)
+    print(f"legacy regex chain: {legacy_rate:10.0f} blocks/sec")
+    print(f"parse_block:        {rate:10.0f} blocks/sec ({rate / legacy_rate:.2f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Import az104_questions.json into an indexed SQLite database with full-text search
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+# The schema lives with the app, which queries it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from search_index import build_index
+from serialization import bank_version
+
+
+def build_database(json_path, db_path):
+    start_time = time.time()
+    with open(json_path, 'r') as f:
+        questions = json.load(f)
+
+    # Build into a temporary file so a running server never sees a half-built database
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        build_index(conn, questions, bank_version(questions))
+        conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('optimize')")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+    elapsed_time = time.time() - start_time
+    print(f"Imported {len(questions)} questions in {elapsed_time:.2f} seconds")
+    print(f"Database size: {os.path.getsize(db_path)} bytes")
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Import the question bank into SQLite')
+    parser.add_argument('input', nargs='?', default=os.path.join(script_dir, 'az104_questions.json'))
+    parser.add_argument('output', nargs='?', default=os.path.join(script_dir, 'az104_questions.sqlite'))
+    args = parser.parse_args()
+
+    print(f"Input: {args.input}")
+    print(f"Output: {args.output}")
+    build_database(args.input, args.output)
+    print(f"Serve it with QUESTIONS_DB={args.output}")
+
+
+if __name__ == '__main__':
+    main()
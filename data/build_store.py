@@ -0,0 +1,40 @@
+# Compile az104_questions.json into the compact columnar store the app can memory-map
+import argparse
+import json
+import os
+import sys
+import time
+
+# The store format lives with the app, which reads it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from columnar_store import write_store
+
+
+def build_store(json_path, store_path):
+    start_time = time.time()
+    with open(json_path, 'r') as f:
+        questions = json.load(f)
+
+    write_store(questions, store_path)
+
+    elapsed_time = time.time() - start_time
+    print(f"Compiled {len(questions)} questions in {elapsed_time:.2f} seconds")
+    print(f"JSON size: {os.path.getsize(json_path)} bytes, store size: {os.path.getsize(store_path)} bytes")
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Compile the question bank into a columnar store')
+    parser.add_argument('input', nargs='?', default=os.path.join(script_dir, 'az104_questions.json'))
+    parser.add_argument('output', nargs='?', default=os.path.join(script_dir, 'az104_questions.qbank'))
+    args = parser.parse_args()
+
+    print(f"Input: {args.input}")
+    print(f"Output: {args.output}")
+    build_store(args.input, args.output)
+    print(f"Serve it with QUESTIONS_PATH={args.output}")
+
+
+if __name__ == '__main__':
+    main()
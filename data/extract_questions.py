@@ -1,84 +1,41 @@
 # Extract all questions from the AZ-104 PDF and save to JSON
-import PyPDF2
+import argparse
 import re
 import json
 import os
 
+from incremental_bank import update_bank
+from question_parser import parse_block
+from text_pipeline import iter_page_texts, iter_question_blocks
+
 def extract_questions(pdf_path):
     questions = []
     q_id = 1
     
     print(f'Opening PDF file: {pdf_path}')
-    with open(pdf_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        print(f'PDF has {len(pdf_reader.pages)} pages')
-        
-        all_text = ''
-        for i, page in enumerate(pdf_reader.pages):
-            if i % 50 == 0:
-                print(f'Processing page {i+1}/{len(pdf_reader.pages)}')
-            all_text += page.extract_text() + '\n'
-        
-        print(f'Total text length: {len(all_text)} characters')
-        
-        # Find all questions using regex
-        # Look for patterns like "Question: 123" or "QUESTION 123"
-        question_markers = list(re.finditer(r'(?:Question:?\s+(\d+)|QUESTION:?\s+(\d+))', all_text))
-        print(f'Found {len(question_markers)} question markers')
+    
+    # Stream pages straight into the block segmenter instead of building one big string
+    # Look for patterns like "Question: 123" or "QUESTION 123"
+    marker = re.compile(r'(?:Question:?\s+(\d+)|QUESTION:?\s+(\d+))')
+    blocks = iter_question_blocks(iter_page_texts(pdf_path), marker)
+    
+    # Process each question block
+    for q_num, block in blocks:
+        parsed = parse_block(block)
         
-        # Process each question block
-        for i, marker in enumerate(question_markers):
-            # Get the question number
-            q_num = marker.group(1) if marker.group(1) else marker.group(2)
-            start_pos = marker.end()
+        # Keep blocks with an answer, at least two options and real question text
+        if parsed.answer and len(parsed.options) >= 2 and len(parsed.question) > 10:
+            questions.append({
+                'id': q_id,
+                'question': parsed.question,
+                'options': parsed.options,
+                'correct_answer': parsed.answer
+            })
+            q_id += 1
             
-            # Determine end position (start of next question or end of text)
-            if i < len(question_markers) - 1:
-                end_pos = question_markers[i+1].start()
-            else:
-                end_pos = len(all_text)
-            
-            # Extract the question block
-            block = all_text[start_pos:end_pos].strip()
-            
-            # Extract options (A, B, C, D)
-            options = {}
-            options_match = re.findall(r'([A-D])\.?\s*(.*?)(?=[A-D]\.|\n[Aa]nswer:|$)', block, re.DOTALL)
-            for opt_letter, opt_text in options_match:
-                options[opt_letter] = opt_text.strip()
-            
-            # Extract answer
-            answer_match = re.search(r'[Aa]nswer:\s*([A-D])', block)
-            if answer_match and len(options) >= 2:
-                correct_answer = answer_match.group(1)
-                
-                # Get question text (everything before options)
-                first_option_pos = -1
-                for opt in 'ABCD':
-                    pos = block.find(f'{opt}.')
-                    if pos > 0 and (first_option_pos == -1 or pos < first_option_pos):
-                        first_option_pos = pos
-                
-                if first_option_pos > 0:
-                    question_text = block[:first_option_pos].strip()
-                    
-                    # Clean up question text (remove "Certy IQ" and other unwanted text)
-                    question_text = re.sub(r'Certy\s*IQ', '', question_text)
-                    question_text = question_text.strip()
-                    
-                    # Add to questions list if the question text is not too short
-                    if len(question_text) > 10:
-                        questions.append({
-                            'id': q_id,
-                            'question': question_text,
-                            'options': options,
-                            'correct_answer': correct_answer
-                        })
-                        q_id += 1
-                        
-                        if q_id % 50 == 0:
-                            print(f'Extracted {q_id-1} questions')
-    
+            if q_id % 50 == 0:
+                print(f'Extracted {q_id-1} questions')
+
     print(f'Extracted {len(questions)} questions total')
     return questions
 
@@ -87,8 +44,15 @@ def main():
         # Define paths
         current_dir = os.path.dirname(os.path.abspath(__file__))
         parent_dir = os.path.dirname(current_dir)
-        pdf_path = os.path.join(parent_dir, 'az-104_update may 31 2024.pdf')
-        output_path = os.path.join(current_dir, 'az104_questions.json')
+        
+        parser = argparse.ArgumentParser(description='Extract all AZ-104 questions from the PDF dump')
+        parser.add_argument('--pdf', default=os.path.join(parent_dir, 'az-104_update may 31 2024.pdf'))
+        parser.add_argument('--output', default=os.path.join(current_dir, 'az104_questions.json'))
+        parser.add_argument('--incremental', action='store_true',
+                            help='merge into the existing bank, keeping ids of unchanged questions')
+        args = parser.parse_args()
+        pdf_path = args.pdf
+        output_path = args.output
         
         print(f'Current directory: {current_dir}')
         print(f'PDF path: {pdf_path}')
@@ -98,7 +62,12 @@ def main():
         questions = extract_questions(pdf_path)
         
         # If we have questions, save them to JSON
-        if questions and len(questions) >= 10:
+        if args.incremental and len(questions) < 10:
+            print('Not enough questions extracted. Leaving the existing bank untouched.')
+        elif args.incremental:
+            # Keep ids of unchanged questions instead of renumbering 1..N
+            update_bank(questions, output_path, source=os.path.basename(pdf_path))
+        elif questions and len(questions) >= 10:
             with open(output_path, 'w') as f:
                 json.dump(questions, f, indent=4)
             print(f'Saved {len(questions)} questions to {output_path}')
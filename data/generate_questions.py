@@ -1,115 +1,119 @@
 # Simple script to generate a large set of sample questions
+import argparse
 import json
 import os
+import random
+import time
 
-def generate_sample_questions(num_questions=572):
-    """Generate a large set of sample AZ-104 questions"""
-    questions = []
-    
-    # Base questions that will be duplicated and modified
-    base_questions = [
-        {
-            "question": "You have an Azure subscription that contains a resource group named RG1. RG1 contains 100 virtual machines. Your company has three cost centers named Manufacturing, Sales, and Research. The Manufacturing cost center uses 50 virtual machines, the Sales cost center uses 30 virtual machines, and the Research cost center uses 20 virtual machines. You need to implement a solution that allows you to track the costs for each department. What should you do?",
-            "options": {
-                "A": "Add a tag to each virtual machine that has a name of Cost Center and a value of the appropriate cost center.",
-                "B": "Move the virtual machines for each cost center to a separate resource group.",
-                "C": "Create a resource group for each cost center and move the appropriate virtual machines to each new resource group.",
-                "D": "Create a policy that prevents the creation of virtual machines that do not have a tag named Cost Center."
-            },
-            "correct_answer": "A"
+# Base questions that will be duplicated and modified
+BASE_QUESTIONS = [
+    {
+        "question": "You have an Azure subscription that contains a resource group named RG1. RG1 contains 100 virtual machines. Your company has three cost centers named Manufacturing, Sales, and Research. The Manufacturing cost center uses 50 virtual machines, the Sales cost center uses 30 virtual machines, and the Research cost center uses 20 virtual machines. You need to implement a solution that allows you to track the costs for each department. What should you do?",
+        "options": {
+            "A": "Add a tag to each virtual machine that has a name of Cost Center and a value of the appropriate cost center.",
+            "B": "Move the virtual machines for each cost center to a separate resource group.",
+            "C": "Create a resource group for each cost center and move the appropriate virtual machines to each new resource group.",
+            "D": "Create a policy that prevents the creation of virtual machines that do not have a tag named Cost Center."
         },
-        {
-            "question": "You have an Azure subscription that contains a virtual network named VNET1. VNET1 contains four subnets named Subnet1, Subnet2, Subnet3, and Subnet4. You plan to deploy Azure Application Gateway to Subnet1. Which configuration must be changed before you deploy Application Gateway?",
-            "options": {
-                "A": "The service endpoint of Subnet1",
-                "B": "The address space of VNET1",
-                "C": "The network security group (NSG) linked to Subnet1",
-                "D": "The address space of Subnet1"
-            },
-            "correct_answer": "D"
+        "correct_answer": "A"
+    },
+    {
+        "question": "You have an Azure subscription that contains a virtual network named VNET1. VNET1 contains four subnets named Subnet1, Subnet2, Subnet3, and Subnet4. You plan to deploy Azure Application Gateway to Subnet1. Which configuration must be changed before you deploy Application Gateway?",
+        "options": {
+            "A": "The service endpoint of Subnet1",
+            "B": "The address space of VNET1",
+            "C": "The network security group (NSG) linked to Subnet1",
+            "D": "The address space of Subnet1"
         },
-        {
-            "question": "You have Azure virtual machines that run Windows Server 2019 and are configured as web servers. You have an Azure Load Balancer that provides load balancing for the web servers. You need to ensure that the load balancer can distribute traffic based on URL path. What should you do?",
-            "options": {
-                "A": "Create a load balancing rule",
-                "B": "Add a health probe",
-                "C": "Upgrade to Azure Application Gateway",
-                "D": "Add an inbound NAT rule"
-            },
-            "correct_answer": "C"
+        "correct_answer": "D"
+    },
+    {
+        "question": "You have Azure virtual machines that run Windows Server 2019 and are configured as web servers. You have an Azure Load Balancer that provides load balancing for the web servers. You need to ensure that the load balancer can distribute traffic based on URL path. What should you do?",
+        "options": {
+            "A": "Create a load balancing rule",
+            "B": "Add a health probe",
+            "C": "Upgrade to Azure Application Gateway",
+            "D": "Add an inbound NAT rule"
         },
-        {
-            "question": "You have an Azure subscription that contains a storage account. You have an on-premises server named Server1 that runs Windows Server 2019. You plan to use Azure Backup to back up Server1 to the storage account. What else should you create before you can configure Azure Backup?",
-            "options": {
-                "A": "A Recovery Services vault",
-                "B": "A backup policy",
-                "C": "A Backup Server",
-                "D": "A site-to-site VPN"
-            },
-            "correct_answer": "A"
+        "correct_answer": "C"
+    },
+    {
+        "question": "You have an Azure subscription that contains a storage account. You have an on-premises server named Server1 that runs Windows Server 2019. You plan to use Azure Backup to back up Server1 to the storage account. What else should you create before you can configure Azure Backup?",
+        "options": {
+            "A": "A Recovery Services vault",
+            "B": "A backup policy",
+            "C": "A Backup Server",
+            "D": "A site-to-site VPN"
         },
-        {
-            "question": "You have an Azure subscription that contains a virtual network named VNet1. VNet1 contains four subnets named Gateway, Perimeter, NVA, and Production. The NVA subnet contains a network virtual appliance (NVA) named VM1 that runs Windows Server 2019. You create a route table named RT1. RT1 contains the routes shown in the following table.\n\nName | Address Prefix | Next Hop Type | Next Hop IP address\n-----|----------------|---------------|------------------\nRoute1 | 10.10.10.0/24 | VirtualAppliance | 10.0.1.4\nRoute2 | 10.20.20.0/24 | VirtualAppliance | 10.0.1.4\n\nYou need to ensure that all traffic from the Perimeter subnet to the Production subnet is inspected by VM1. What should you do?",
-            "options": {
-                "A": "Apply RT1 to the Perimeter subnet.",
-                "B": "Configure VM1 as a router.",
-                "C": "Apply RT1 to the Production subnet.",
-                "D": "Create a network interface, and then configure IP forwarding."
-            },
-            "correct_answer": "A"
+        "correct_answer": "A"
+    },
+    {
+        "question": "You have an Azure subscription that contains a virtual network named VNet1. VNet1 contains four subnets named Gateway, Perimeter, NVA, and Production. The NVA subnet contains a network virtual appliance (NVA) named VM1 that runs Windows Server 2019. You create a route table named RT1. RT1 contains the routes shown in the following table.\n\nName | Address Prefix | Next Hop Type | Next Hop IP address\n-----|----------------|---------------|------------------\nRoute1 | 10.10.10.0/24 | VirtualAppliance | 10.0.1.4\nRoute2 | 10.20.20.0/24 | VirtualAppliance | 10.0.1.4\n\nYou need to ensure that all traffic from the Perimeter subnet to the Production subnet is inspected by VM1. What should you do?",
+        "options": {
+            "A": "Apply RT1 to the Perimeter subnet.",
+            "B": "Configure VM1 as a router.",
+            "C": "Apply RT1 to the Production subnet.",
+            "D": "Create a network interface, and then configure IP forwarding."
         },
-        {
-            "question": "You have an Azure subscription that contains an Azure Storage account named storage1 and an Azure Key Vault named vault1. You plan to create an Azure function app named app1 that will use a system-assigned managed identity to access storage1. You need to ensure that app1 can access the connection string for storage1. The solution must minimize the number of secrets that are stored in the code for app1. What should you do?",
-            "options": {
-                "A": "Store the connection string in vault1, and then create an access policy in vault1.",
-                "B": "Store the connection string in an app setting of app1, and then enable the system-assigned managed identity for app1.",
-                "C": "Store the connection string in vault1, enable the system-assigned managed identity for app1, and then create an access policy in vault1.",
-                "D": "Store the connection string in an app setting of app1."
-            },
-            "correct_answer": "C"
+        "correct_answer": "A"
+    },
+    {
+        "question": "You have an Azure subscription that contains an Azure Storage account named storage1 and an Azure Key Vault named vault1. You plan to create an Azure function app named app1 that will use a system-assigned managed identity to access storage1. You need to ensure that app1 can access the connection string for storage1. The solution must minimize the number of secrets that are stored in the code for app1. What should you do?",
+        "options": {
+            "A": "Store the connection string in vault1, and then create an access policy in vault1.",
+            "B": "Store the connection string in an app setting of app1, and then enable the system-assigned managed identity for app1.",
+            "C": "Store the connection string in vault1, enable the system-assigned managed identity for app1, and then create an access policy in vault1.",
+            "D": "Store the connection string in an app setting of app1."
         },
-        {
-            "question": "You have a Microsoft 365 tenant and an Azure subscription. You plan to grant access to developers to manage all the resources in the Azure subscription. The developers have Microsoft accounts that are already associated to the Azure subscription as guests. You need to ensure that the developers can access the Azure subscription by using the Microsoft Entra ID credentials of the Microsoft 365 tenant. What should you do?",
-            "options": {
-                "A": "From the Microsoft 365 admin center, modify the user settings of Microsoft Entra ID.",
-                "B": "From the Azure portal, register an identity provider in Microsoft Entra ID.",
-                "C": "From the Microsoft 365 admin center, purchase Microsoft Entra ID P1 licenses for the developers.",
-                "D": "From the Azure portal, modify the directory role of the developer accounts."
-            },
-            "correct_answer": "B"
+        "correct_answer": "C"
+    },
+    {
+        "question": "You have a Microsoft 365 tenant and an Azure subscription. You plan to grant access to developers to manage all the resources in the Azure subscription. The developers have Microsoft accounts that are already associated to the Azure subscription as guests. You need to ensure that the developers can access the Azure subscription by using the Microsoft Entra ID credentials of the Microsoft 365 tenant. What should you do?",
+        "options": {
+            "A": "From the Microsoft 365 admin center, modify the user settings of Microsoft Entra ID.",
+            "B": "From the Azure portal, register an identity provider in Microsoft Entra ID.",
+            "C": "From the Microsoft 365 admin center, purchase Microsoft Entra ID P1 licenses for the developers.",
+            "D": "From the Azure portal, modify the directory role of the developer accounts."
         },
-        {
-            "question": "You have an Azure subscription that contains a resource group named rg1017. In rg1017, you create an internal load balancer named lb17 and a virtual machine named vm17 that has the required supporting resources. You need to ensure that all traffic from the 10.0.0.0/16 subnet to vm17 is routed through lb17. What should you do?",
-            "options": {
-                "A": "Create a route table, and then apply the route table to the subnet that contains vm17.",
-                "B": "Configure a load balancing rule.",
-                "C": "Create an inbound NAT rule.",
-                "D": "Configure a health probe."
-            },
-            "correct_answer": "B"
+        "correct_answer": "B"
+    },
+    {
+        "question": "You have an Azure subscription that contains a resource group named rg1017. In rg1017, you create an internal load balancer named lb17 and a virtual machine named vm17 that has the required supporting resources. You need to ensure that all traffic from the 10.0.0.0/16 subnet to vm17 is routed through lb17. What should you do?",
+        "options": {
+            "A": "Create a route table, and then apply the route table to the subnet that contains vm17.",
+            "B": "Configure a load balancing rule.",
+            "C": "Create an inbound NAT rule.",
+            "D": "Configure a health probe."
         },
-        {
-            "question": "You have an Azure subscription that contains a virtual network named VNet1. VNet1 contains a subnet named Subnet1. You create a network security group (NSG) named NSG1. You need to apply NSG1 to Subnet1. What should you do?",
-            "options": {
-                "A": "From the Azure portal, select VNet1, and then select Service endpoints.",
-                "B": "From Azure PowerShell, run the Set-AzVirtualNetworkSubnetConfig and the Set-AzVirtualNetwork cmdlets.",
-                "C": "From Azure PowerShell, run the Set-AzNetworkSecurityGroup cmdlet.",
-                "D": "From the Azure portal, select NSG1, and then select Inbound security rules."
-            },
-            "correct_answer": "B"
+        "correct_answer": "B"
+    },
+    {
+        "question": "You have an Azure subscription that contains a virtual network named VNet1. VNet1 contains a subnet named Subnet1. You create a network security group (NSG) named NSG1. You need to apply NSG1 to Subnet1. What should you do?",
+        "options": {
+            "A": "From the Azure portal, select VNet1, and then select Service endpoints.",
+            "B": "From Azure PowerShell, run the Set-AzVirtualNetworkSubnetConfig and the Set-AzVirtualNetwork cmdlets.",
+            "C": "From Azure PowerShell, run the Set-AzNetworkSecurityGroup cmdlet.",
+            "D": "From the Azure portal, select NSG1, and then select Inbound security rules."
         },
-        {
-            "question": "You need to monitor the health status of resources in an Azure subscription. The solution must meet the following requirements: Include an interactive and customizable dashboard. Provide a centralized view of the health of all resources. Minimize costs. What should you use?",
-            "options": {
-                "A": "Azure Service Health",
-                "B": "Azure Monitor action groups",
-                "C": "Azure Network Watcher",
-                "D": "Azure Advisor"
-            },
-            "correct_answer": "A"
-        }
-    ]
+        "correct_answer": "B"
+    },
+    {
+        "question": "You need to monitor the health status of resources in an Azure subscription. The solution must meet the following requirements: Include an interactive and customizable dashboard. Provide a centralized view of the health of all resources. Minimize costs. What should you use?",
+        "options": {
+            "A": "Azure Service Health",
+            "B": "Azure Monitor action groups",
+            "C": "Azure Network Watcher",
+            "D": "Azure Advisor"
+        },
+        "correct_answer": "A"
+    }
+]
+
+def generate_sample_questions(num_questions=572):
+    """Generate a large set of sample AZ-104 questions"""
+    questions = []
     
+    base_questions = BASE_QUESTIONS
     # Number of variations for each base question
     variations = num_questions // len(base_questions) + 1
     
@@ -135,15 +139,145 @@ def generate_sample_questions(num_questions=572):
     
     return questions[:num_questions]  # Ensure we return exactly the requested number
 
+# Topic of each base question, in BASE_QUESTIONS order
+BASE_TOPICS = [
+    "Identities and governance",
+    "Virtual networking",
+    "Virtual networking",
+    "Monitoring and backup",
+    "Virtual networking",
+    "Storage",
+    "Identities and governance",
+    "Virtual networking",
+    "Virtual networking",
+    "Monitoring and backup",
+]
+
+# Extra scenario sentences prepended to a base question to vary its length
+SCENARIO_SENTENCES = [
+    "The subscription is linked to a Microsoft Entra tenant named contoso{n}.onmicrosoft.com.",
+    "You have {n} virtual machines that run Windows Server 2022 in the East US region.",
+    "A storage account named storage{n} is configured for geo-redundant storage (GRS).",
+    "The company has a policy that requires all resources to be tagged with a department name.",
+    "A virtual network named VNet{n} has an address space of 10.{n}.0.0/16.",
+    "Developers deploy resources by using ARM templates stored in a repository named repo{n}.",
+    "Log data is sent to a Log Analytics workspace named workspace{n}.",
+    "An administrator named Admin{n} is assigned the Contributor role for the subscription.",
+    "The solution must minimize administrative effort.",
+    "The solution must minimize costs.",
+    "Network traffic between the on-premises network and Azure uses a site-to-site VPN.",
+    "A Recovery Services vault named vault{n} protects the production workloads.",
+]
+
+# Plausible wrong answers mixed into synthetic option lists
+DISTRACTORS = [
+    "Create a new resource group and move the resources to it.",
+    "Assign the Reader role at the subscription level.",
+    "Configure a service endpoint on the subnet.",
+    "Enable soft delete on the storage account.",
+    "Create an Azure Policy assignment.",
+    "Add a network security group rule.",
+    "Deploy an Azure Firewall.",
+    "Create an action group in Azure Monitor.",
+    "Upgrade the storage account to general-purpose v2.",
+    "Configure a private endpoint.",
+]
+
+OPTION_LETTERS = "ABCDEF"
+
+def iter_synthetic_questions(count, seed=0, start_id=1):
+    """
+    Yield `count` realistic questions one at a time, the same ones for the same seed.
+
+    Each is a base question with 0 or more scenario sentences in front
+    (so text lengths vary), 2-6 options with the answer at a random letter,
+    and the base question's topic tag. Nothing is kept between questions,
+    so memory use doesn't grow with `count`.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        base_idx = rng.randrange(len(BASE_QUESTIONS))
+        base = BASE_QUESTIONS[base_idx]
+        
+        # Mostly short scenarios with a long tail, like the real dumps
+        num_sentences = min(int(rng.expovariate(0.4)), len(SCENARIO_SENTENCES))
+        sentences = [s.format(n=rng.randrange(1, 1000)) for s in rng.sample(SCENARIO_SENTENCES, num_sentences)]
+        
+        # The correct option plus wrong ones from the base question and the distractors
+        num_options = rng.choice((2, 3, 4, 4, 4, 4, 5, 6))
+        correct = base["options"][base["correct_answer"]]
+        wrong = [text for letter, text in base["options"].items() if letter != base["correct_answer"]]
+        wrong += rng.sample(DISTRACTORS, num_options)
+        choices = [correct] + rng.sample(wrong, num_options - 1)
+        rng.shuffle(choices)
+        
+        yield {
+            "id": start_id + i,
+            "question": " ".join(sentences + [base["question"]]),
+            "options": dict(zip(OPTION_LETTERS, choices)),
+            "correct_answer": OPTION_LETTERS[choices.index(correct)],
+            "topic": BASE_TOPICS[base_idx],
+        }
+
+def write_questions(questions, output_path, fmt="json"):
+    """
+    Stream questions to disk as a JSON array or as NDJSON (one object per line).
+    Returns how many were written.
+    """
+    count = 0
+    with open(output_path, 'w') as f:
+        if fmt == "json":
+            f.write("[\n")
+        for q in questions:
+            if fmt == "json" and count:
+                f.write(",\n")
+            f.write(json.dumps(q))
+            if fmt == "ndjson":
+                f.write("\n")
+            count += 1
+        if fmt == "json":
+            f.write("\n]\n")
+    return count
+
+def generate_synthetic_bank(count, output_path, seed=0, fmt=None):
+    """Write `count` synthetic questions to `output_path` without holding them in memory"""
+    if fmt is None:
+        fmt = "ndjson" if output_path.endswith((".ndjson", ".jsonl")) else "json"
+    start_time = time.time()
+    written = write_questions(iter_synthetic_questions(count, seed), output_path, fmt)
+    elapsed_time = time.time() - start_time
+    rate = written / elapsed_time if elapsed_time > 0 else float('inf')
+    print(f"Wrote {written} questions ({fmt}) in {elapsed_time:.2f} seconds ({rate:.0f} questions/sec)")
+    print(f"File size: {os.path.getsize(output_path)} bytes")
+    return written
+
 def main():
     try:
         # Define paths
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_path = os.path.join(script_dir, 'az104_questions.json')
+        
+        parser = argparse.ArgumentParser(description='Generate sample AZ-104 questions')
+        parser.add_argument('--synthetic', type=int, metavar='N',
+                            help='stream N synthetic questions instead of the 572-question sample bank')
+        parser.add_argument('--seed', type=int, default=0, help='random seed for --synthetic')
+        parser.add_argument('--format', choices=('json', 'ndjson'),
+                            help='output format for --synthetic (default: from the file extension)')
+        parser.add_argument('--output',
+                            help='output file (default: az104_questions.json; required with --synthetic)')
+        args = parser.parse_args()
+        # A synthetic bank must never overwrite the shipped one by accident
+        if args.synthetic is not None and args.output is None:
+            parser.error('--synthetic needs an explicit --output')
+        output_path = args.output or os.path.join(script_dir, 'az104_questions.json')
         
         print(f"Script directory: {script_dir}")
         print(f"Output path: {output_path}")
         
+        if args.synthetic is not None:
+            print(f"Generating {args.synthetic} synthetic AZ-104 questions (seed {args.seed})...")
+            generate_synthetic_bank(args.synthetic, output_path, seed=args.seed, fmt=args.format)
+            return
+        
         print(f"Generating 572 sample AZ-104 questions...")
         questions = generate_sample_questions(572)
         
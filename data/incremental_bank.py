@@ -0,0 +1,210 @@
+# Merge freshly parsed questions into the existing bank without renumbering it
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+MANIFEST_SUFFIX = '.manifest.json'
+CHANGELOG_SUFFIX = '.changelog.jsonl'
+
+_whitespace = re.compile(r'\s+')
+
+def _normalize(value):
+    """
+    Canonical form of a question field: whitespace collapsed, dict keys sorted
+    """
+    if isinstance(value, str):
+        return _whitespace.sub(' ', value).strip()
+    if isinstance(value, dict):
+        return {key: _normalize(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+def _digest(value):
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:32]
+
+def question_fingerprint(q):
+    """
+    Hash of everything in a question except its id, after normalization
+    """
+    return _digest(_normalize({key: value for key, value in q.items() if key != 'id'}))
+
+def stem_fingerprint(q):
+    """
+    Hash of the question text alone; a matching stem with a different
+    fingerprint means the question was edited rather than replaced
+    """
+    return _digest(_normalize(q['question']).casefold())
+
+def _keyed(questions, key):
+    """
+    (key, question) pairs where the n-th repeat of the same key gets "#n",
+    so repeated questions in a dump keep distinct, stable identities
+    """
+    seen = {}
+    for q in questions:
+        k = key(q)
+        seen[k] = seen.get(k, 0) + 1
+        yield (k if seen[k] == 1 else f"{k}#{seen[k]}"), q
+
+def bootstrap_manifest(bank):
+    """
+    Manifest for a bank built before incremental mode: its current ids are kept
+    """
+    entries = {}
+    for (fingerprint, q), (stem, _) in zip(_keyed(bank, question_fingerprint), _keyed(bank, stem_fingerprint)):
+        entries[str(q['id'])] = {'fingerprint': fingerprint, 'stem': stem}
+    return {
+        'next_id': max((q['id'] for q in bank), default=0) + 1,
+        'questions': entries,
+        'tombstones': {},
+    }
+
+def merge_questions(manifest, parsed, keep=None):
+    """
+    Give every parsed question an id from the existing bank where possible.
+
+    Identical questions keep their id; a question whose text matches a
+    removed or changed one takes over that id as an update; anything else is
+    appended with a fresh id. Questions that disappeared are tombstoned in
+    the manifest, so their ids are never handed out again and come back if
+    the question reappears. For a partial extraction, `keep` maps the ids
+    of the current bank to its questions, and those not seen in `parsed`
+    are kept as they are instead. Returns (questions, manifest, changes).
+    """
+    live = manifest['questions']
+    tombstones = manifest['tombstones']
+    by_fingerprint = {entry['fingerprint']: int(qid) for qid, entry in live.items()}
+    by_stem = {}
+    for entries in (tombstones, live):
+        for qid, entry in entries.items():
+            by_stem[entry['stem']] = int(qid)
+    restorable = {entry['fingerprint']: int(qid) for qid, entry in tombstones.items()}
+
+    next_id = manifest['next_id']
+    merged = []
+    claimed = set()
+    changes = {'added': [], 'updated': [], 'restored': [], 'removed': [], 'unchanged': 0}
+    pending = []
+
+    keyed = list(zip(_keyed(parsed, question_fingerprint), _keyed(parsed, stem_fingerprint)))
+    # Exact matches first, so an edit elsewhere can't steal an unchanged question's id
+    for (fingerprint, q), (stem, _) in keyed:
+        qid = by_fingerprint.get(fingerprint)
+        if qid is not None and qid not in claimed:
+            claimed.add(qid)
+            changes['unchanged'] += 1
+            merged.append((qid, fingerprint, stem, q))
+        else:
+            pending.append((fingerprint, stem, q))
+
+    for fingerprint, stem, q in pending:
+        qid = restorable.get(fingerprint)
+        if qid is not None and qid not in claimed:
+            changes['restored'].append(qid)
+        else:
+            qid = by_stem.get(stem)
+            if qid is not None and qid not in claimed:
+                changes['updated'].append(qid)
+            else:
+                qid = next_id
+                next_id += 1
+                changes['added'].append(qid)
+        claimed.add(qid)
+        merged.append((qid, fingerprint, stem, q))
+
+    removed_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    new_tombstones = {qid: entry for qid, entry in tombstones.items() if int(qid) not in claimed}
+    for qid, entry in live.items():
+        if int(qid) not in claimed and keep is not None and int(qid) in keep:
+            claimed.add(int(qid))
+            merged.append((int(qid), entry['fingerprint'], entry['stem'], keep[int(qid)]))
+        elif int(qid) not in claimed:
+            changes['removed'].append(int(qid))
+            new_tombstones[qid] = dict(entry, removed_at=removed_at)
+
+    merged.sort(key=lambda item: item[0])
+    questions = [dict(q, id=qid) for qid, _, _, q in merged]
+    new_manifest = {
+        'next_id': next_id,
+        'questions': {str(qid): {'fingerprint': fingerprint, 'stem': stem} for qid, fingerprint, stem, _ in merged},
+        'tombstones': new_tombstones,
+    }
+    for key in ('added', 'updated', 'restored', 'removed'):
+        changes[key].sort()
+    return questions, new_manifest, changes
+
+def _write_json(path, data, indent=None):
+    # Write next to the target and swap it in, so the app never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+def update_bank(parsed, bank_path, source=None, partial=False):
+    """
+    Merge `parsed` into the bank at `bank_path` and write the bank, its
+    manifest and a changelog entry. With `partial`, `parsed` is only part
+    of the source (e.g. the first N questions), so nothing is removed.
+    Returns the changes.
+    """
+    start_time = time.time()
+    bank = []
+    if os.path.exists(bank_path):
+        with open(bank_path, 'r') as f:
+            bank = json.load(f)
+
+    manifest_path = bank_path + MANIFEST_SUFFIX
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    else:
+        print(f"No manifest at {manifest_path}, keeping the ids of the current bank")
+        manifest = bootstrap_manifest(bank)
+
+    keep = {q['id']: q for q in bank} if partial else None
+    questions, manifest, changes = merge_questions(manifest, parsed, keep)
+    changed = changes['added'] or changes['updated'] or changes['restored'] or changes['removed']
+
+    if changed or not os.path.exists(manifest_path):
+        _write_json(bank_path, questions, indent=4)
+        _write_json(manifest_path, manifest)
+    if changed:
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'source': source,
+            'total': len(questions),
+            **changes,
+        }
+        with open(bank_path + CHANGELOG_SUFFIX, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    elapsed_time = time.time() - start_time
+    print(f"Merged {len(parsed)} parsed questions in {elapsed_time:.2f} seconds: "
+          f"{changes['unchanged']} unchanged, {len(changes['added'])} added, "
+          f"{len(changes['updated'])} updated, {len(changes['restored'])} restored, "
+          f"{len(changes['removed'])} removed")
+    if not changed:
+        print(f"{bank_path} is already up to date")
+    return changes
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Merge newly parsed questions into the bank, keeping ids stable')
+    parser.add_argument('parsed', help='JSON list of questions from one of the extractors')
+    parser.add_argument('--bank', default=os.path.join(script_dir, 'az104_questions.json'))
+    parser.add_argument('--partial', action='store_true',
+                        help='the parsed questions are only part of the source; remove nothing')
+    args = parser.parse_args()
+
+    with open(args.parsed, 'r') as f:
+        parsed = json.load(f)
+    update_bank(parsed, args.bank, source=os.path.basename(args.parsed), partial=args.partial)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# Find near-duplicate questions with MinHash signatures and locality-sensitive hashing
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+from incremental_bank import update_bank
+
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_SIZE = 3
+
+# Hash values are reduced mod a Mersenne prime below 2**31 so a*x + b fits in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_words = re.compile(r'\w+')
+
+def question_shingles(q, size=SHINGLE_SIZE):
+    """
+    32-bit hashes of the word n-grams of a question's text and options
+    """
+    text = ' '.join([q['question'], *(q.get('options') or {}).values()])
+    words = _words.findall(text.lower())
+    if len(words) < size:
+        grams = [' '.join(words)]
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams)))
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=1, chunk_size=1 << 16):
+    """
+    (len(shingle_sets), num_perm) array of MinHash values.
+
+    Shingles of many questions are hashed together in chunks of about
+    `chunk_size` and the per-question minimum is taken with reduceat, so the
+    cost is a few large array operations instead of one loop per question.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)[:, None]
+    b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)[:, None]
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint64)
+
+    start = 0
+    while start < len(shingle_sets):
+        end, total = start, 0
+        while end < len(shingle_sets) and (end == start or total + len(shingle_sets[end]) <= chunk_size):
+            total += len(shingle_sets[end])
+            end += 1
+        chunk = shingle_sets[start:end]
+        lengths = np.fromiter((len(s) for s in chunk), dtype=np.int64, count=len(chunk))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        hashed = (a * np.concatenate(chunk) + b) % _PRIME
+        signatures[start:end] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        start = end
+    return signatures
+
+def candidate_pairs(signatures, bands=BANDS):
+    """
+    Pairs of rows that agree on every value of at least one band
+    """
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            # Link each member to the first one; union-find does the rest
+            first = members[0]
+            pairs.update((first, other) for other in members[1:])
+    return pairs
+
+def find_clusters(questions, threshold=0.8, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Groups of bank positions whose estimated Jaccard similarity is at least
+    `threshold`, largest first; questions without a near-duplicate are left out.
+
+    LSH only proposes candidate pairs (items sharing a band bucket), so the
+    work grows with the number of near-duplicates rather than n**2; each
+    candidate is then checked against the full signature.
+    """
+    signatures = minhash_signatures([question_shingles(q) for q in questions], num_perm)
+    parent = list(range(len(questions)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidate_pairs(signatures, bands):
+        if np.count_nonzero(signatures[i] == signatures[j]) >= threshold * num_perm:
+            ri, rj = root(i), root(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    groups = {}
+    for i in range(len(questions)):
+        groups.setdefault(root(i), []).append(i)
+    clusters = [members for members in groups.values() if len(members) > 1]
+    clusters.sort(key=lambda members: (-len(members), members[0]))
+    return clusters
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Report (and optionally collapse) near-duplicate questions')
+    parser.add_argument('bank', nargs='?', default=os.path.join(script_dir, 'az104_questions.json'))
+    parser.add_argument('--threshold', type=float, default=0.8, help='minimum estimated Jaccard similarity')
+    parser.add_argument('--report', help='write the clusters to this JSON file')
+    parser.add_argument('--collapse', action='store_true',
+                        help='keep the first question of each cluster and tombstone the rest in the bank')
+    args = parser.parse_args()
+
+    with open(args.bank, 'r') as f:
+        questions = json.load(f)
+
+    start_time = time.time()
+    clusters = find_clusters(questions, args.threshold)
+    elapsed_time = time.time() - start_time
+    duplicates = sum(len(members) - 1 for members in clusters)
+    print(f"Checked {len(questions)} questions in {elapsed_time:.2f} seconds: "
+          f"{len(clusters)} clusters, {duplicates} near-duplicates")
+    for members in clusters[:10]:
+        first = questions[members[0]]
+        print(f"  {len(members):5d} x id {first['id']}: {first['question'][:70]!r}")
+
+    if args.report:
+        report = [
+            {'keep': questions[members[0]]['id'], 'duplicates': [questions[i]['id'] for i in members[1:]]}
+            for members in clusters
+        ]
+        with open(args.report, 'w') as f:
+            json.dump({'threshold': args.threshold, 'clusters': report}, f, indent=4)
+        print(f"Saved {len(report)} clusters to {args.report}")
+
+    if args.collapse:
+        dropped = {i for members in clusters for i in members[1:]}
+        kept = [q for i, q in enumerate(questions) if i not in dropped]
+        update_bank(kept, args.bank, source='near_duplicates')
+
+if __name__ == '__main__':
+    main()
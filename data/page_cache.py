@@ -0,0 +1,157 @@
+# Persistent cache of extracted page text, so re-parsing a PDF skips extract_text()
+import PyPDF2
+import hashlib
+import os
+import sqlite3
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.page_cache.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_text (
+    content_key TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_pages (
+    pdf_sha256 TEXT NOT NULL,
+    pypdf2_version TEXT NOT NULL,
+    page_index INTEGER NOT NULL,
+    content_key TEXT NOT NULL,
+    PRIMARY KEY (pdf_sha256, pypdf2_version, page_index)
+);
+"""
+
+def file_sha256(path):
+    """
+    SHA-256 of a file, read in 1 MB chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def page_content_key(page):
+    """
+    Fingerprint everything extract_text() reads for one page.
+
+    The page's content stream, rotation, font definitions and form
+    XObjects (whose text extract_text() also reads, with their own fonts
+    and nested forms) are hashed together with the PyPDF2 version, so a
+    revised PDF only misses the cache for pages that really changed, and a
+    PyPDF2 upgrade misses everywhere.
+    """
+    digest = hashlib.sha256(PyPDF2.__version__.encode('utf-8'))
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    digest.update(repr(page.get('/Rotate', 0)).encode('utf-8'))
+    _hash_resources(digest, page.get('/Resources'), set())
+    return digest.hexdigest()
+
+def _hash_resources(digest, resources, seen):
+    """
+    Feed the fonts and form XObjects of a resource dictionary into `digest`.
+
+    `seen` holds the ids of forms already hashed, so shared or
+    self-referencing forms are hashed once.
+    """
+    resources = resources.get_object() if resources is not None else {}
+    fonts = resources.get('/Font')
+    fonts = fonts.get_object() if fonts is not None else {}
+    for name in sorted(fonts):
+        font = fonts[name].get_object()
+        digest.update(f"{name}{font.get('/BaseFont')}{font.get('/Subtype')}{font.get('/Encoding')}".encode('utf-8'))
+        to_unicode = font.get('/ToUnicode')
+        if to_unicode is not None:
+            digest.update(to_unicode.get_object().get_data())
+
+    xobjects = resources.get('/XObject')
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    for name in sorted(xobjects):
+        xobject = xobjects[name].get_object()
+        # Images carry no text; only forms are read by extract_text()
+        if xobject.get('/Subtype') != '/Form' or id(xobject) in seen:
+            continue
+        seen.add(id(xobject))
+        digest.update(f"{name}".encode('utf-8'))
+        digest.update(xobject.get_data())
+        _hash_resources(digest, xobject.get('/Resources'), seen)
+
+class PageTextCache:
+    """
+    SQLite-backed store of page text.
+
+    Text is stored by page content key. Each PDF (by SHA-256 and PyPDF2
+    version) also gets a manifest of its pages' keys, so an unchanged file is
+    served without even opening its page content streams.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        # Pool workers write concurrently; WAL plus a busy timeout keeps that safe
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def document_texts(self, pdf_sha256, num_pages):
+        """
+        Iterator over all page texts of a previously completed PDF, or None
+        """
+        key = (pdf_sha256, PyPDF2.__version__)
+        (count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM document_pages WHERE pdf_sha256 = ? AND pypdf2_version = ?", key
+        ).fetchone()
+        if count != num_pages:
+            return None
+        self.hits += num_pages
+        rows = self.conn.execute(
+            "SELECT p.text FROM document_pages d "
+            "JOIN page_text p ON p.content_key = d.content_key "
+            "WHERE d.pdf_sha256 = ? AND d.pypdf2_version = ? ORDER BY d.page_index",
+            key,
+        )
+        return (text for (text,) in rows)
+
+    def get(self, content_key):
+        row = self.conn.execute("SELECT text FROM page_text WHERE content_key = ?", (content_key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, content_key, text):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO page_text (content_key, text) VALUES (?, ?)", (content_key, text))
+
+    def record_document(self, pdf_sha256, content_keys):
+        """
+        Remember which page texts make up a fully extracted PDF
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO document_pages (pdf_sha256, pypdf2_version, page_index, content_key) "
+                "VALUES (?, ?, ?, ?)",
+                ((pdf_sha256, PyPDF2.__version__, i, key) for i, key in enumerate(content_keys)),
+            )
+
+    def close(self):
+        self.conn.close()
+
+def extract_page_text(pdf_reader, page_num, cache=None):
+    """
+    Text of one page as (content key, text, cache hit), served from `cache` when possible
+    """
+    page = pdf_reader.pages[page_num]
+    if cache is None:
+        return None, page.extract_text(), False
+    content_key = page_content_key(page)
+    text = cache.get(content_key)
+    if text is not None:
+        return content_key, text, True
+    text = page.extract_text()
+    cache.put(content_key, text)
+    return content_key, text, False
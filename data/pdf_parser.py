@@ -1,10 +1,15 @@
-import PyPDF2
+import argparse
 import re
 import json
 import os
 import traceback
 
-def extract_questions_from_pdf(pdf_path):
+from incremental_bank import update_bank
+from page_cache import DEFAULT_CACHE_PATH
+from question_parser import parse_block
+from text_pipeline import QUESTION_MARKER, iter_page_texts, iter_question_blocks
+
+def extract_questions_from_pdf(pdf_path, workers=1, cache_path=DEFAULT_CACHE_PATH):
     """
     Extract questions and answers from the AZ-104 PDF file
     """
@@ -12,109 +17,49 @@ def extract_questions_from_pdf(pdf_path):
     
     try:
         print(f"Opening PDF file: {pdf_path}")
-        # Open the PDF file
-        with open(pdf_path, 'rb') as file:
-            # Create a PDF reader object
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            print(f"PDF has {len(pdf_reader.pages)} pages")
-            
-            # First pass: collect all text to analyze structure
-            full_text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-                full_text += text + "\n"
-                if page_num % 50 == 0:  # Only print every 50 pages to reduce output clutter
-                    print(f"Processed page {page_num+1}/{len(pdf_reader.pages)}")
+        print("Extracting questions from text...")
+        
+        # Question blocks are parsed as soon as the next marker is extracted,
+        # so the whole document is never held in memory
+        blocks = iter_question_blocks(iter_page_texts(pdf_path, workers, cache_path=cache_path), QUESTION_MARKER)
+        
+        question_count = 0
+        marker_count = 0
+        for q_num, block_text in blocks:
+            marker_count += 1
+            block_text = block_text.strip()
             
-            print(f"Total characters extracted: {len(full_text)}")
-            print("Extracting questions from text...")
+            # Skip if block is too short
+            if len(block_text) < 20:
+                continue
             
-            # Find all question markers
-            # Using various patterns to catch different formats in the PDF
-            question_markers = re.finditer(r'(?:Question:?\s*(\d+)|QUESTION:?\s*(\d+))', full_text)
+            parsed = parse_block(block_text)
+            if not parsed.answer:
+                print(f"No answer found for question {q_num}, skipping")
+                continue
             
-            # Get the positions of all question markers
-            question_positions = []
-            for match in question_markers:
-                q_num = match.group(1) if match.group(1) else match.group(2)
-                question_positions.append((int(q_num), match.start(), match.end()))
+            if len(parsed.options) < 2:
+                print(f"Not enough options found for question {q_num}, skipping")
+                continue
             
-            question_positions.sort(key=lambda x: x[1])  # Sort by position in text
+            # Skip if question text is too short
+            if len(parsed.question) < 10:
+                print(f"Question text too short for question {q_num}, skipping")
+                continue
             
-            print(f"Found {len(question_positions)} question markers")
+            # Add to our questions list
+            questions.append({
+                'id': q_num,
+                'question': parsed.question,
+                'options': parsed.options,
+                'correct_answer': parsed.answer
+            })
             
-            # Extract question blocks using the positions
-            question_count = 0
-            for i, (q_num, start_pos, end_pos) in enumerate(question_positions):
-                # Get the text from this question to the next one
-                if i < len(question_positions) - 1:
-                    next_start = question_positions[i+1][1]
-                    block_text = full_text[end_pos:next_start].strip()
-                else:
-                    block_text = full_text[end_pos:].strip()
-                
-                # Skip if block is too short
-                if len(block_text) < 20:
-                    continue
-                
-                # Extract answer section
-                answer_match = re.search(r'[Aa]nswer:\s*([A-D])', block_text)
-                if not answer_match:
-                    print(f"No answer found for question {q_num}, skipping")
-                    continue
-                
-                correct_answer = answer_match.group(1)
-                
-                # Find the options A, B, C, D
-                options_sections = re.findall(r'([A-D])\.[\s\n]*(.*?)(?=[A-D]\.|\n[Aa]nswer:|$)', block_text, re.DOTALL)
-                
-                if not options_sections or len(options_sections) < 2:
-                    print(f"Not enough options found for question {q_num}, skipping")
-                    continue
-                
-                options = {}
-                for opt_letter, opt_text in options_sections:
-                    options[opt_letter] = opt_text.strip()
-                
-                # Find the question text (everything before the options)
-                first_option_pos = block_text.find('A.')
-                if first_option_pos == -1:
-                    # Try another common format
-                    first_option_pos = block_text.find('A\n')
-                
-                if first_option_pos > 0:
-                    question_text = block_text[:first_option_pos].strip()
-                else:
-                    # If we can't find option A, use the first 1/3 of the text as the question
-                    question_text = block_text[:len(block_text)//3].strip()
-                
-                # Clean up question text
-                question_text = re.sub(r'Certy\s*IQ', '', question_text)
-                question_text = question_text.strip()
-                
-                # Skip if question text is too short
-                if len(question_text) < 10:
-                    print(f"Question text too short for question {q_num}, skipping")
-                    continue
-                
-                # Skip if we don't have enough options
-                if len(options) < 2:
-                    print(f"Not enough valid options for question {q_num}, skipping")
-                    continue
-                
-                # Add to our questions list
-                questions.append({
-                    'id': q_num,
-                    'question': question_text,
-                    'options': options,
-                    'correct_answer': correct_answer
-                })
-                
-                question_count += 1
-                if question_count % 50 == 0:  # Only print every 50 questions to reduce output clutter
-                    print(f"Successfully extracted {question_count} questions so far")
+            question_count += 1
+            if question_count % 50 == 0:  # Only print every 50 questions to reduce output clutter
+                print(f"Successfully extracted {question_count} questions so far")
+    
+        print(f"Found {marker_count} question markers")
         
         # Sort questions by ID
         questions.sort(key=lambda x: x['id'])
@@ -138,18 +83,25 @@ def save_questions_to_json(questions, output_path):
         json.dump(questions, f, indent=4)
     
     print(f"Saved {len(questions)} questions to {output_path}")
-    with open(output_path, 'w') as f:
-        json.dump(questions, f, indent=4)
-    
-    print(f"Saved {len(questions)} questions to {output_path}")
 
 if __name__ == "__main__":
     try:
         # Define paths
         current_dir = os.path.dirname(os.path.abspath(__file__))
         parent_dir = os.path.dirname(current_dir)
-        pdf_path = os.path.join(parent_dir, 'az-104_update may 31 2024.pdf')
-        output_path = os.path.join(current_dir, 'az104_questions.json')
+        
+        parser = argparse.ArgumentParser(description='Extract AZ-104 questions from the PDF dump')
+        parser.add_argument('--pdf', default=os.path.join(parent_dir, 'az-104_update may 31 2024.pdf'))
+        parser.add_argument('--output', default=os.path.join(current_dir, 'az104_questions.json'))
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='processes used for page text extraction (default: CPU count)')
+        parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='page text cache file')
+        parser.add_argument('--no-cache', action='store_true', help='always re-extract every page')
+        parser.add_argument('--incremental', action='store_true',
+                            help='merge into the existing bank, keeping ids of unchanged questions')
+        args = parser.parse_args()
+        pdf_path = args.pdf
+        output_path = args.output
         
         print(f"Current directory: {current_dir}")
         print(f"Parent directory: {parent_dir}")
@@ -162,7 +114,9 @@ if __name__ == "__main__":
             print("Please make sure the PDF file is in the correct location.")
         else:
             # Extract questions from PDF
-            questions = extract_questions_from_pdf(pdf_path)
+            questions = extract_questions_from_pdf(
+                pdf_path, workers=args.workers, cache_path=None if args.no_cache else args.cache
+            )
             
             # Check if we got any questions
             if not questions or len(questions) < 10:
@@ -236,7 +190,8 @@ if __name__ == "__main__":
                     print(f"Error in backup extraction: {str(e)}")
             
             # If we still don't have enough questions, use sample questions as failsafe
-            if not questions or len(questions) < 10:
+            # (in incremental mode the existing bank is the failsafe)
+            if not args.incremental and (not questions or len(questions) < 10):
                 print("WARNING: Could not extract enough questions. Including sample questions.")
                 # Add some sample questions 
                 sample_questions = [
@@ -306,60 +261,13 @@ if __name__ == "__main__":
                     questions = sample_questions
             
             # Save questions to JSON
-            save_questions_to_json(questions, output_path)
-    except Exception as e:
-        print(f"Error in main: {str(e)}")
-        traceback.print_exc()
-                    },
-                    {
-                        "id": 2,
-                        "question": "You have an Azure subscription that contains a virtual network named VNET1. VNET1 contains four subnets named Subnet1, Subnet2, Subnet3, and Subnet4. You plan to deploy Azure Application Gateway to Subnet1. Which configuration must be changed before you deploy Application Gateway?",
-                        "options": {
-                            "A": "The service endpoint of Subnet1",
-                            "B": "The address space of VNET1",
-                            "C": "The network security group (NSG) linked to Subnet1",
-                            "D": "The address space of Subnet1"
-                        },
-                        "correct_answer": "D"
-                    },
-                    {
-                        "id": 3,
-                        "question": "You have Azure virtual machines that run Windows Server 2019 and are configured as web servers. You have an Azure Load Balancer that provides load balancing for the web servers. You need to ensure that the load balancer can distribute traffic based on URL path. What should you do?",
-                        "options": {
-                            "A": "Create a load balancing rule",
-                            "B": "Add a health probe",
-                            "C": "Upgrade to Azure Application Gateway",
-                            "D": "Add an inbound NAT rule"
-                        },
-                        "correct_answer": "C"
-                    },
-                    {
-                        "id": 4,
-                        "question": "You have an Azure subscription that contains a storage account. You have an on-premises server named Server1 that runs Windows Server 2019. You plan to use Azure Backup to back up Server1 to the storage account. What else should you create before you can configure Azure Backup?",
-                        "options": {
-                            "A": "A Recovery Services vault",
-                            "B": "A backup policy",
-                            "C": "A Backup Server",
-                            "D": "A site-to-site VPN"
-                        },
-                        "correct_answer": "A"
-                    },
-                    {
-                        "id": 5,
-                        "question": "You have an Azure subscription that contains a virtual network named VNet1. VNet1 contains four subnets named Gateway, Perimeter, NVA, and Production. The NVA subnet contains a network virtual appliance (NVA) named VM1 that runs Windows Server 2019. You create a route table named RT1. RT1 contains the routes shown in the following table.\n\nName | Address Prefix | Next Hop Type | Next Hop IP address\n-----|----------------|---------------|------------------\nRoute1 | 10.10.10.0/24 | VirtualAppliance | 10.0.1.4\nRoute2 | 10.20.20.0/24 | VirtualAppliance | 10.0.1.4\n\nYou need to ensure that all traffic from the Perimeter subnet to the Production subnet is inspected by VM1. What should you do?",
-                        "options": {
-                            "A": "Apply RT1 to the Perimeter subnet.",
-                            "B": "Configure VM1 as a router.",
-                            "C": "Apply RT1 to the Production subnet.",
-                            "D": "Create a network interface, and then configure IP forwarding."
-                        },
-                        "correct_answer": "A"
-                    }
-                ]
-                questions = sample_questions
-            
-            # Save questions to JSON
-            save_questions_to_json(questions, output_path)
+            if not args.incremental:
+                save_questions_to_json(questions, output_path)
+            elif len(questions) < 10:
+                print("WARNING: Could not extract enough questions. Leaving the existing bank untouched.")
+            else:
+                # Keep ids of unchanged questions instead of renumbering 1..N
+                update_bank(questions, output_path, source=os.path.basename(pdf_path))
     except Exception as e:
         print(f"Error in main: {str(e)}")
         traceback.print_exc()
@@ -0,0 +1,80 @@
+# Single-pass parser for question blocks, shared by the extraction scripts
+import re
+from collections import namedtuple
+
+ParsedBlock = namedtuple('ParsedBlock', ['question', 'options', 'answer', 'explanation'])
+
+OPTION_LETTERS = 'ABCDEF'
+
+# Compiled once at import; every block reuses them
+NOISE = re.compile(r'Certy\s*IQ')
+ANSWER = re.compile(r'[Aa]nswer:\s*([A-F])\b')
+EXPLANATION_LABEL = re.compile(r'(?:Explanation|Reference)s?:\s*')
+
+def _find_option(text, letter, start, opening):
+    """
+    Offset of the next "X." marker for `letter` at or after `start`, or -1.
+
+    A marker has to start a word. The first one ("A.") must also open a
+    line or follow the end of a sentence ("...do? A. ..."), so a name like
+    "subnet A." inside the question isn't taken for the option list.
+    """
+    marker = letter + '.'
+    pos = text.find(marker, start)
+    while pos != -1:
+        if pos == 0 or text[pos - 1] in ' \t\n':
+            if not opening:
+                return pos
+            i = pos - 1
+            while i >= 0 and text[i] in ' \t':
+                i -= 1
+            if i < 0 or text[i] in '\n?:.)':
+                return pos
+        pos = text.find(marker, pos + 1)
+    return -1
+
+def parse_block(block):
+    """
+    Split the text of one question block into question, options, answer and explanation.
+
+    The answer is located first; the text before it is walked once, with
+    options expected in order (A., B., C., ...), so a stray "X." in the
+    question text can't reorder or swallow them. Text after the answer is
+    the explanation. "Certy IQ" watermarks are dropped wherever they
+    appear. Missing parts come back empty/None.
+    """
+    if 'Certy' in block:
+        # Drop each watermark along with the spaces before it
+        parts = NOISE.split(block)
+        block = ''.join(part.rstrip(' \t') for part in parts[:-1]) + parts[-1]
+
+    # Start the regex at the first "nswer:" rather than scanning from the top
+    start = block.find('nswer:')
+    answer_match = ANSWER.search(block, start - 1) if start > 0 else None
+    if answer_match:
+        head = block[:answer_match.start()]
+        tail = block[answer_match.end():].strip()
+        label = EXPLANATION_LABEL.match(tail)
+        explanation = (tail[label.end():] if label else tail) or None
+        answer = answer_match.group(1)
+    else:
+        head, explanation, answer = block, None, None
+
+    # Walk the options in order: each marker is searched for after the previous one
+    starts = []
+    pos = 0
+    for letter in OPTION_LETTERS:
+        pos = _find_option(head, letter, pos, not starts)
+        if pos == -1:
+            break
+        starts.append(pos)
+        pos += 2
+    ends = starts[1:] + [len(head)]
+    options = {OPTION_LETTERS[i]: head[begin + 2:end].strip() for i, (begin, end) in enumerate(zip(starts, ends))}
+
+    return ParsedBlock(
+        question=head[:starts[0] if starts else len(head)].strip(),
+        options=options,
+        answer=answer,
+        explanation=explanation,
+    )
@@ -0,0 +1,133 @@
+# Streaming PDF text pipeline shared by the extraction scripts:
+# pages -> page text -> question blocks, one item at a time
+import PyPDF2
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from page_cache import DEFAULT_CACHE_PATH, PageTextCache, extract_page_text, file_sha256
+
+# "Question: 12" / "QUESTION 12" style markers, as used by pdf_parser.py
+QUESTION_MARKER = re.compile(r'(?:Question:?\s*(\d+)|QUESTION:?\s*(\d+))')
+
+# Characters of one page searched again with the next, enough for a marker
+# such as "QUESTION: " cut off at the end of a page
+MARKER_OVERLAP = 64
+
+# Each pool process opens the PDF (and the page cache) once and keeps them here
+_worker_reader = None
+_worker_cache = None
+
+def _init_worker(pdf_path, cache_path):
+    """
+    Pool initializer: give this process its own PdfReader and cache connection
+    """
+    global _worker_reader, _worker_cache
+    _worker_reader = PyPDF2.PdfReader(pdf_path)
+    _worker_cache = PageTextCache(cache_path) if cache_path else None
+
+def _extract_page_range(page_range):
+    """
+    Worker: extract pages [start, end) as (content key, text, cache hit) tuples
+    """
+    start, end = page_range
+    return [extract_page_text(_worker_reader, i, _worker_cache) for i in range(start, end)]
+
+def iter_page_texts(pdf_path, workers=1, progress_every=50, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Yield the text of every page, in page order, as soon as it is extracted.
+
+    With workers > 1 the page range is split into chunks that a process pool
+    extracts in parallel; each worker opens the PDF itself since readers
+    can't be shared between processes. Stopping iteration early cancels
+    the pages nobody asked for.
+
+    Page text is cached on disk at `cache_path` (None disables the cache):
+    an unchanged PDF is replayed from the cache, and a revised one only
+    re-extracts pages whose content changed.
+    """
+    start_time = time.time()
+    pdf_reader = PyPDF2.PdfReader(pdf_path)
+    num_pages = len(pdf_reader.pages)
+    print(f"PDF has {num_pages} pages")
+
+    cache = PageTextCache(cache_path) if cache_path else None
+    try:
+        if cache is not None:
+            pdf_sha256 = file_sha256(pdf_path)
+            cached = cache.document_texts(pdf_sha256, num_pages)
+            if cached is not None:
+                print(f"All {num_pages} pages served from the page cache")
+                yield from cached
+                return
+
+        content_keys = []
+        extracted = 0
+        workers = max(1, min(workers, num_pages))
+        if workers == 1:
+            pages = (extract_page_text(pdf_reader, i, cache) for i in range(num_pages))
+            pool = None
+        else:
+            # Several chunks per worker so a slow stretch of pages doesn't stall the pool
+            chunk_size = max(1, -(-num_pages // (workers * 4)))
+            page_ranges = [(start, min(start + chunk_size, num_pages)) for start in range(0, num_pages, chunk_size)]
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_path, cache_path))
+            # map() yields chunks in submission order, so pages stay in order
+            pages = (page for chunk in pool.map(_extract_page_range, page_ranges) for page in chunk)
+        try:
+            for content_key, text, hit in pages:
+                yield text
+                content_keys.append(content_key)
+                extracted += not hit
+                if progress_every and len(content_keys) % progress_every == 0:
+                    print(f"Processed page {len(content_keys)}/{num_pages}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        if cache is not None:
+            cache.record_document(pdf_sha256, content_keys)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    elapsed_time = time.time() - start_time
+    rate = num_pages / elapsed_time if elapsed_time > 0 else float('inf')
+    print(f"Processed {num_pages} pages in {elapsed_time:.2f} seconds ({rate:.1f} pages/sec, "
+          f"{workers} workers, {extracted} extracted, {num_pages - extracted} from cache)")
+
+def iter_question_blocks(texts, marker=QUESTION_MARKER):
+    """
+    Split a stream of page texts into (question number, block text) pairs.
+
+    A block runs from the end of one marker to the start of the next, and is
+    yielded as soon as that next marker shows up; only the block being
+    collected is held in memory. Pages are joined with a newline, so a
+    marker's number can never straddle two pages. Text before the first
+    marker is dropped.
+
+    Each page is scanned once: only its text plus the last MARKER_OVERLAP
+    characters of the page before (where a marker cut off by the page end
+    may begin) are searched, and the block is kept as a list of pieces, so
+    long blocks cost linear rather than quadratic time.
+    """
+    pieces = []
+    tail = ''
+    current = None
+    for text in texts:
+        window = tail + text + '\n'
+        start = 0
+        for match in marker.finditer(window):
+            if current is not None:
+                pieces.append(window[start:match.start()])
+                yield current, ''.join(pieces)
+            pieces = []
+            current = int(next(group for group in match.groups() if group))
+            start = match.end()
+        # Carry the unmatched end over to the next page's search
+        split = max(start, len(window) - MARKER_OVERLAP)
+        if current is not None:
+            pieces.append(window[start:split])
+        tail = window[split:]
+    if current is not None:
+        yield current, ''.join(pieces) + tail
@@ -1,12 +1,80 @@
 import os
+import signal
 import sys
+import threading
+import time
 
 # Add the app directory to Python path for imports
 app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'app'))
 sys.path.insert(0, app_dir)
 
-# Import the Flask app
-from app import app
+def watch_bank(server, bank, interval):
+    """
+    Master-side watcher: when the bank file changes, SIGHUP the gunicorn master.
+
+    Only stats the file (no locks a forked worker could inherit held); the
+    reload itself happens in on_reload, on the master's main thread.
+    """
+    last_seen = bank.file_signature()
+    while True:
+        time.sleep(interval)
+        signature = bank.file_signature()
+        if signature != last_seen:
+            last_seen = signature
+            server.log.info("Question bank changed, restarting workers")
+            os.kill(server.pid, signal.SIGHUP)
+
+def run_gunicorn(host, port, workers, threads):
+    """
+    Serve with gunicorn, the bank preloaded in the master.
+
+    Workers are forked after the bank is parsed, so they share its pages
+    copy-on-write instead of each holding a copy. Workers don't reload the
+    bank themselves: the master watches the file, loads the new version and
+    replaces the workers gracefully (in-flight requests finish on the old ones).
+    """
+    from gunicorn.app.base import BaseApplication
+
+    # Import the Flask app (and load the bank) here in the master, before any fork
+    import app as app_module
+    from app import app
+
+    if workers > 1 and not app_module.session_store.db_path:
+        # Each worker would hold its own sessions, and requests land on either
+        print("Warning: quiz sessions need SESSIONS_DB with more than one worker", file=sys.stderr)
+
+    check_interval = float(os.environ.get('BANK_CHECK_INTERVAL', 1.0))
+    # Forked workers keep the snapshot they were born with
+    app_module.bank.check_interval = float('inf')
+
+    def when_ready(server):
+        threading.Thread(target=watch_bank, args=(server, app_module.bank, check_interval), daemon=True).start()
+
+    def on_reload(server):
+        if app_module.bank.refresh():
+            server.log.info("Loaded new question bank version %s", app_module.bank.get().version)
+
+    options = {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'preload_app': True,
+        'graceful_timeout': int(os.environ.get('GRACEFUL_TIMEOUT', 30)),
+        'accesslog': '-' if os.environ.get('ACCESS_LOG', 'False').lower() == 'true' else None,
+        'when_ready': when_ready,
+        'on_reload': on_reload,
+    }
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    PreloadedApplication().run()
 
 if __name__ == '__main__':
     # Get host and port from environment variables if set
@@ -16,5 +84,16 @@ if __name__ == '__main__':
     # Set debug mode based on environment
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
-    # Run the app
-    app.run(host=host, port=port, debug=debug)
+    # SERVER=gunicorn for production: WORKERS processes with THREADS threads each.
+    # The asyncio variant (app/async_app.py) serves only the read API and is
+    # run directly by benchmarks/compare_async.py, not from here
+    server = os.environ.get('SERVER', 'dev').lower()
+    
+    if server == 'gunicorn' and not debug:
+        workers = int(os.environ.get('WORKERS', os.cpu_count() or 1))
+        threads = int(os.environ.get('THREADS', 4))
+        run_gunicorn(host, port, workers, threads)
+    else:
+        # Run the app
+        from app import app
+        app.run(host=host, port=port, debug=debug)
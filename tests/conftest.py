@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The app and data scripts import their siblings as top-level modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'data'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'app'))
+
+
+@pytest.fixture(scope='session')
+def flask_app():
+    import app as app_module
+    return app_module
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.app.test_client()
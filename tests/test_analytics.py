@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from analytics import NO_RESPONDENT, AnswerLog, item_statistics, stats_report
+from grading import NO_ANSWER, AnswerKey, encode_letters
+
+QUESTIONS = [
+    {'id': 1, 'correct_answer': 'A'},
+    {'id': 2, 'correct_answer': 'B'},
+]
+
+
+def snapshot():
+    # No question list: the report must get by with the answer key
+    return SimpleNamespace(answer_key=AnswerKey.from_questions(QUESTIONS), version='v1')
+
+
+def test_item_statistics():
+    key = AnswerKey.from_questions(QUESTIONS)
+    stats = item_statistics(
+        key, np.array([1, 1, 1, 2, 9]), encode_letters(['A', 'A', 'C', None, 'A']), np.full(5, NO_RESPONDENT, np.int32)
+    )
+    assert stats['responses'].tolist() == [3, 1]
+    assert stats['p_value'][0] == 2 / 3
+    assert stats['picks'][0].tolist() == [2, 0, 1, 0, 0, 0, 0]
+    assert stats['picks'][1].tolist() == [0, 0, 0, 0, 0, 0, 1]
+
+
+def test_most_picked_is_none_without_picks():
+    log = AnswerLog()
+    log.record([1, 2], encode_letters(['B', None]))
+    by_id = {question['id']: question for question in stats_report(snapshot(), log)['questions']}
+    assert by_id[1]['most_picked'] == 'B'
+    assert by_id[2]['most_picked'] is None
+    assert by_id[2]['unanswered'] == 1
+
+
+def test_key_lookups_are_not_recorded(client, flask_app):
+    question_id = flask_app.bank.get().questions[0]['id']
+    before = len(flask_app.answer_log)
+    response = client.post('/api/answers', json={'answers': [
+        {'question_id': question_id, 'answer': None},
+        {'question_id': question_id},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['correct_answer']
+    assert len(flask_app.answer_log) == before
+
+    client.post('/api/answers', json={'answers': [
+        {'question_id': question_id, 'answer': None},
+        {'question_id': question_id, 'answer': 'A'},
+    ]})
+    assert len(flask_app.answer_log) == before + 1
+    _, codes, _ = flask_app.answer_log.columns()
+    assert codes[-1] != NO_ANSWER
+
+
+def test_ingest_maps_anonymous_tags():
+    log = AnswerLog()
+    log.ingest([1, 1, 2], encode_letters(['A', 'B', 'A']), [0, 77, 77])
+    _, _, respondents = log.columns()
+    assert respondents[0] == NO_RESPONDENT
+    assert respondents[1] == respondents[2] != NO_RESPONDENT
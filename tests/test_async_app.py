@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+aiohttp_test_utils = pytest.importorskip('aiohttp.test_utils')
+
+from async_app import create_app
+
+
+def fetch(flask_app, *paths):
+    """(status, headers, body) of each path on the asyncio app serving the Flask app's bank"""
+    async def run():
+        app = create_app(flask_app.bank.path, check_interval=3600)
+        async with aiohttp_test_utils.TestClient(aiohttp_test_utils.TestServer(app)) as client:
+            results = []
+            for path in paths:
+                response = await client.get(path)
+                results.append((response.status, response.headers, await response.read()))
+            return results
+    return asyncio.run(run())
+
+
+def test_same_responses_as_flask(client, flask_app):
+    paths = ['/api/questions?limit=5&seed=7&answers=0', '/api/questions?offset=0&page_size=3']
+    for path, (status, headers, body) in zip(paths, fetch(flask_app, *paths)):
+        expected = client.get(path)
+        assert status == expected.status_code == 200
+        assert body == expected.data
+    assert b'correct_answer' not in fetch(flask_app, paths[0])[0][2]
+
+
+def test_bad_limit(flask_app):
+    assert [status for status, _, _ in fetch(flask_app, '/api/questions?limit=-5', '/api/questions?limit=0')] == [400, 400]
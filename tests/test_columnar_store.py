@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from columnar_store import write_store
+from question_bank import QuestionBank
+from serialization import iter_chunks
+
+QUESTIONS = [
+    {'id': 3, 'question': 'First?', 'options': {'A': 'yes', 'B': 'no'}, 'correct_answer': 'A', 'topic': 'Storage'},
+    {'id': 1, 'question': 'Second?', 'options': {'A': 'yes', 'B': 'no'}, 'correct_answer': 'B', 'topic': 'Compute'},
+]
+
+
+@pytest.fixture
+def store_bank(tmp_path, flask_app, monkeypatch):
+    """Serve a memory-mapped .qbank store from the app for one test"""
+    path = str(tmp_path / 'bank.qbank')
+    write_store(QUESTIONS, path)
+    bank = QuestionBank(path, check_interval=0)
+    monkeypatch.setattr(flask_app, 'bank', bank)
+    return bank
+
+
+def test_question_by_id(client, store_bank):
+    response = client.get('/api/question/1')
+    assert response.status_code == 200
+    assert json.loads(response.data) == QUESTIONS[1]
+    assert client.get('/api/question/2').status_code == 404
+
+
+@pytest.mark.parametrize('question_id', ['99999999999999999999999', str(2**63)])
+def test_out_of_range_id_is_not_found(client, store_bank, question_id):
+    assert client.get(f'/api/question/{question_id}').status_code == 404
+
+
+def test_full_bank_is_sent_from_the_mapping(client, store_bank):
+    body = store_bank.get().view(True).all_questions
+    # The uncompressed body is the mapped blob itself, not a copy
+    assert isinstance(body.variant(None), memoryview)
+    response = client.get('/api/questions', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert response.content_length == len(body.variant(None))
+    assert json.loads(response.data) == QUESTIONS
+    assert client.get('/api/questions', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_iter_chunks():
+    data = memoryview(b'0123456789')
+    assert list(iter_chunks(data, size=4)) == [b'0123', b'4567', b'89']
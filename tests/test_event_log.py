@@ -0,0 +1,112 @@
+import io
+import time
+
+import numpy as np
+
+from event_log import SEGMENT_MAGIC, EventLog, make_events, read_segment, replay, segment_paths
+
+
+def wait_written(log, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while log.written + log.lost < count:
+        assert time.monotonic() < deadline, log.stats()
+        time.sleep(0.005)
+
+
+def test_write_and_replay(tmp_path):
+    log = EventLog(str(tmp_path), fsync=False)
+    events = make_events([1, 2, 2**40], [0, 1, 255], [1, 0, 255], respondent=[7, 7, 0], now=10.0)
+    assert log.submit(events)
+    log.close()
+    replayed = np.concatenate(list(replay(str(tmp_path))))
+    assert replayed.tobytes() == events.tobytes()
+    assert log.stats()['submitted'] == log.stats()['written'] == 3
+
+
+def test_segments_rotate(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=1, fsync=False)
+    for count in range(1, 4):
+        log.submit(make_events([count], [0]))
+        wait_written(log, count)
+    log.close()
+    assert len(segment_paths(str(tmp_path))) == log.segments == 3
+    assert [int(events['question_id'][0]) for events in replay(str(tmp_path))] == [1, 2, 3]
+
+
+def test_torn_record_and_stray_file_are_ignored(tmp_path):
+    events = make_events([1, 2], [0, 0])
+    path = tmp_path / 'a.events'
+    path.write_bytes(SEGMENT_MAGIC + events.tobytes()[:-3])
+    assert read_segment(str(path))['question_id'].tolist() == [1]
+    stray = tmp_path / 'b.events'
+    stray.write_bytes(events.tobytes())
+    assert len(read_segment(str(stray))) == 0
+
+
+class BrokenSegment(io.BytesIO):
+    def write(self, data):
+        raise OSError('disk full')
+
+
+def test_failed_write_closes_the_segment_and_counts_lost_events(tmp_path):
+    log = EventLog(str(tmp_path), fsync=False)
+    broken = BrokenSegment()
+    open_segment = log._open_segment
+    log._open_segment = lambda: broken
+    log.submit(make_events([1, 2], [0, 0]))
+    wait_written(log, 2)
+    assert broken.closed
+    assert log.errors == 1 and log.lost == 2
+
+    log._open_segment = open_segment
+    log.submit(make_events([3], [0]))
+    wait_written(log, 3)
+    log.close()
+    assert [events['question_id'].tolist() for events in replay(str(tmp_path))] == [[3]]
+
+
+class FakeEventLog:
+    def __init__(self, accept):
+        self.accept = accept
+        self.submitted = []
+
+    def submit(self, events):
+        if self.accept:
+            self.submitted.append(events)
+        return self.accept
+
+
+def test_events_are_queued_as_one_array(client, flask_app, monkeypatch):
+    fake = FakeEventLog(accept=True)
+    monkeypatch.setattr(flask_app, 'event_log', fake)
+    before = len(flask_app.answer_log)
+    response = client.post('/api/events', json={'events': [
+        {'question_id': 1, 'answer': 'A', 'session': 's1', 'correct': True},
+        {'question_id': 2, 'answer': 'B', 'learner': 'l1'},
+        {'question_id': 3, 'answer': 'C'},
+    ]})
+    assert response.status_code == 202
+    assert len(fake.submitted) == 1
+    events = fake.submitted[0]
+    assert events['question_id'].tolist() == [1, 2, 3]
+    assert events['correct'].tolist() == [1, 255, 255]
+    assert events['respondent'][2] == 0 and len(set(events['respondent'][:2])) == 2
+    assert len(flask_app.answer_log) == before + 3
+
+
+def test_full_queue_records_nothing(client, flask_app, monkeypatch):
+    monkeypatch.setattr(flask_app, 'event_log', FakeEventLog(accept=False))
+    before = len(flask_app.answer_log)
+    response = client.post('/api/events', json={'events': [
+        {'question_id': 1, 'answer': 'A', 'session': 's1'},
+        {'question_id': 2, 'answer': 'B', 'learner': 'l1'},
+    ]})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert len(flask_app.answer_log) == before
+
+    # A graded answer is still returned; only its statistics are dropped
+    question_id = flask_app.bank.get().questions[0]['id']
+    response = client.post('/api/answers', json={'question_id': question_id, 'answer': 'A'})
+    assert response.status_code == 200
+    assert len(flask_app.answer_log) == before
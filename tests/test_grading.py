@@ -0,0 +1,38 @@
+import pytest
+
+from grading import AnswerKey, is_question_id
+
+
+def test_is_question_id():
+    assert is_question_id(1)
+    assert is_question_id(2**63 - 1)
+    assert not is_question_id(2**63)
+    assert not is_question_id(-2**63 - 1)
+    assert not is_question_id(True)
+    assert not is_question_id(1.0)
+    assert not is_question_id('1')
+
+
+def test_grade_vectorized():
+    key = AnswerKey.from_questions([
+        {'id': 5, 'correct_answer': 'B'},
+        {'id': 2, 'correct_answer': 'A'},
+    ])
+    found, correct, codes = key.grade([2, 5, 9], ['A', 'C', 'A'])
+    assert found.tolist() == [True, True, False]
+    assert correct.tolist() == [True, False, False]
+
+
+@pytest.mark.parametrize('question_id', [2**70, -2**70, True, False, 1.5, '1'])
+def test_answers_rejects_bad_ids(client, question_id):
+    response = client.post('/api/answers', json={'question_id': question_id, 'answer': 'A'})
+    assert response.status_code == 400
+    response = client.post('/api/answers', json={'answers': [{'question_id': question_id, 'answer': 'A'}]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('question_id', [2**70, True])
+def test_other_routes_reject_bad_ids(client, question_id):
+    assert client.post('/api/sessions', json={'question_ids': [question_id]}).status_code == 400
+    assert client.post('/api/review', json={'learner': 'x', 'question_id': question_id}).status_code == 400
+    assert client.post('/api/events', json={'question_id': question_id}).status_code == 400
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from question_bank import QuestionBank
+
+QUESTIONS = [
+    {'id': 1, 'question': 'First?', 'options': {'A': 'yes', 'B': 'no'}, 'correct_answer': 'A'},
+    {'id': 2, 'question': 'Second?', 'options': {'A': 'yes', 'B': 'no'}, 'correct_answer': 'B'},
+]
+
+
+def write(path, content, mtime):
+    path.write_text(content if isinstance(content, str) else json.dumps(content))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize('content', [
+    '[{"id": 1',                       # half-written
+    '[1, 2]',                          # items that aren't objects
+    '[{"question": "no id"}]',         # missing id
+    '{"id": 1}',                       # not an array
+    '[{"id": 1, "options": ["A"]}]',   # options of the wrong type
+])
+def test_bad_reload_keeps_previous_snapshot(tmp_path, content):
+    path = tmp_path / 'bank.json'
+    write(path, QUESTIONS, 1_000_000)
+    bank = QuestionBank(str(path), check_interval=0)
+    first = bank.get()
+
+    write(path, content, 2_000_000)
+    assert bank.get() is first
+    assert bank.refresh() is False
+    assert bank.errors >= 1
+
+
+def test_bad_first_load_raises(tmp_path):
+    path = tmp_path / 'bank.json'
+    write(path, '[1, 2]', 1_000_000)
+    with pytest.raises(ValueError):
+        QuestionBank(str(path)).get()
+
+
+def test_good_reload_replaces_snapshot(tmp_path):
+    path = tmp_path / 'bank.json'
+    write(path, QUESTIONS, 1_000_000)
+    bank = QuestionBank(str(path), check_interval=0)
+    bank.get()
+
+    write(path, QUESTIONS[:1], 2_000_000)
+    assert bank.refresh() is True
+    assert len(bank.get().questions) == 1
+
+
+def test_broken_file_is_parsed_and_logged_once(tmp_path, caplog):
+    path = tmp_path / 'bank.json'
+    write(path, QUESTIONS, 1_000_000)
+    bank = QuestionBank(str(path), check_interval=0)
+    first = bank.get()
+
+    write(path, '[{"id": 1', 2_000_000)
+    for _ in range(5):
+        assert bank.get() is first
+    assert bank.errors == 1
+    assert len([record for record in caplog.records if record.levelname == 'ERROR']) == 1
+
+    # Fixing the file is picked up on the next check
+    write(path, QUESTIONS[:1], 3_000_000)
+    assert len(bank.get().questions) == 1
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.mark.parametrize('query', ['limit=-5', 'limit=0', 'topic=x&limit=-3'])
+def test_bad_limit(client, query):
+    assert client.get(f'/api/questions?{query}').status_code == 400
+
+
+def test_limit_samples(client):
+    response = client.get('/api/questions?limit=3&seed=1')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
@@ -0,0 +1,66 @@
+import numpy as np
+
+from scheduler import FIRST_INTERVAL, RELEARN_INTERVAL, LearnerSchedule
+
+
+def introduce_all(schedule, bank_ids, now=0.0):
+    """Ids introduced as new until the schedule has nothing new to offer"""
+    introduced = []
+    while True:
+        question_id = schedule._new_question(bank_ids)
+        if question_id is None:
+            return introduced
+        schedule._slot(question_id, now)
+        introduced.append(question_id)
+
+
+def test_every_question_is_introduced_once():
+    bank_ids = np.arange(1, 51, dtype=np.int64)
+    introduced = introduce_all(LearnerSchedule('alice'), bank_ids)
+    assert sorted(introduced) == bank_ids.tolist()
+
+
+def test_bank_growth_introduces_every_new_question():
+    for learner in ('alice', 'bob', 'carol', 'dave'):
+        schedule = LearnerSchedule(learner)
+        assert sorted(introduce_all(schedule, np.arange(1, 11))) == list(range(1, 11))
+        assert sorted(introduce_all(schedule, np.arange(1, 21))) == list(range(11, 21))
+
+
+def test_swapped_ids_at_the_same_size_are_introduced():
+    schedule = LearnerSchedule('alice')
+    old = np.arange(1, 6)
+    for _ in range(5):
+        question_id, _ = schedule.next_question(old, lambda question_id: True, 0.0, 'v1')
+        schedule.review(question_id, True, 0.0)
+    new = np.arange(2, 7)
+    known = lambda question_id: 2 <= question_id <= 6
+    assert schedule.next_question(new, known, 0.0, 'v2') == (6, True)
+
+
+def test_scheduler_takes_a_snapshot(flask_app):
+    # Whole snapshots are passed so the scheduler can see the bank version
+    snapshot = flask_app.bank.get()
+    question_id, is_due = flask_app.scheduler.next_question('route-test', snapshot)
+    assert is_due and snapshot.answer_key.position(question_id) is not None
+
+
+def test_large_ids():
+    schedule = LearnerSchedule('alice')
+    big = 2**40
+    assert introduce_all(schedule, np.array([big])) == [big]
+    assert schedule.next_question(np.array([big]), lambda question_id: True, 0.0) == (big, True)
+
+
+def test_review_intervals():
+    schedule = LearnerSchedule('alice')
+    assert schedule.review(7, True, 0.0) == FIRST_INTERVAL
+    assert schedule.review(7, False, 100.0) == 100.0 + RELEARN_INTERVAL
+    known = lambda question_id: True
+    assert schedule.next_question(np.array([7]), known, 100.0) == (7, False)
+    assert schedule.next_question(np.array([7]), known, 100.0 + RELEARN_INTERVAL) == (7, True)
+
+
+def test_learner_stats_route(client):
+    client.get('/api/next?learner=stats-test')
+    assert client.get('/api/learners/stats').get_json()['learners'] >= 1
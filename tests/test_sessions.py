@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from sessions import QuizSession, SessionStore
+
+
+def test_session_flow(client, flask_app):
+    snapshot = flask_app.bank.get()
+    response = client.post('/api/sessions', json={'limit': 5, 'seed': 3})
+    assert response.status_code == 201
+    body = response.get_json()
+    session_id, question_ids = body['session_id'], body['question_ids']
+    assert len(question_ids) == 5 and body['seed'] == 3
+
+    question = next(q for q in snapshot.questions if q['id'] == question_ids[1])
+    response = client.post(f'/api/sessions/{session_id}/answers',
+                           json={'question_id': question_ids[1], 'answer': question['correct_answer']})
+    assert response.get_json()['correct'] is True
+    assert client.post(f'/api/sessions/{session_id}/flags', json={'question_id': question_ids[0]}).status_code == 200
+
+    resumed = client.get(f'/api/sessions/{session_id}').get_json()
+    assert resumed['question_ids'] == question_ids
+    assert resumed['flagged'][:2] == [True, False]
+    assert resumed['answered'] == 1 and resumed['score'] == 1 and resumed['current'] == 2
+
+
+def test_whole_bank_session_is_in_bank_order(client, flask_app):
+    body = client.post('/api/sessions').get_json()
+    assert body['question_ids'] == [q['id'] for q in flask_app.bank.get().questions]
+
+
+@pytest.mark.parametrize('limit', [True, False, 0, -1, 1.5, '5'])
+def test_bad_limit(client, limit):
+    assert client.post('/api/sessions', json={'limit': limit}).status_code == 400
+
+
+def test_bool_seed_is_replaced(client):
+    body = client.post('/api/sessions', json={'limit': 2, 'seed': True}).get_json()
+    assert body['seed'] is not True
+
+
+def test_least_recently_used_are_evicted():
+    store = SessionStore(max_sessions=2)
+    first, second = store.create([1, 2]), store.create([3])
+    assert store.get(first.id) is first
+    store.create([4])
+    assert store.get(second.id) is None
+    assert store.get(first.id) is first
+    assert store.evictions == 1
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl=60)
+    session = store.create([1])
+    session.updated = time.time() - 61
+    assert store.get(session.id) is None
+    assert store.expirations == 1
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = SessionStore(max_sessions=1, db_path=path)
+    session = store.create([7, 2**40, 3])
+    session.set_answer(1, 2)
+    session.set_flag(2, True)
+    store.save(session)
+
+    restored = SessionStore(db_path=path).get(session.id)
+    assert restored.question_ids.tolist() == [7, 2**40, 3]
+    assert restored.answer_codes().tolist()[:2] == [255, 2]
+    assert restored.flag_mask().tolist() == [False, False, True]
+    assert restored.current == 2
+
+
+def test_flags_are_bits():
+    session = QuizSession('s', range(10))
+    session.set_flag(9, True)
+    session.set_flag(3, True)
+    session.set_flag(3, False)
+    assert len(session.flags) == 2
+    assert session.flag_mask().tolist() == [False] * 9 + [True]
+
+
+def test_workers_share_sessions_through_sqlite(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    # Two stores on one database behave like two server workers
+    first, second = SessionStore(db_path=path), SessionStore(db_path=path)
+    session = first.create([1, 2, 3])
+
+    other = second.get(session.id)
+    other.set_answer(0, 1)
+    second.save(other)
+
+    # The first worker sees the change instead of its own stale copy, and keeps it when saving
+    mine = first.get(session.id)
+    assert mine.answer_codes().tolist()[0] == 1
+    mine.set_answer(2, 0)
+    first.save(mine)
+    assert second.get(session.id).answer_codes().tolist() == [1, 255, 0]
+
+
+def test_connection_opens_on_first_use(tmp_path):
+    store = SessionStore(db_path=str(tmp_path / 'sessions.db'))
+    assert store._conn is None
+    store.create([1])
+    assert store._conn is not None and store.stats()['persistent']
@@ -0,0 +1,39 @@
+import random
+import re
+import time
+
+import pytest
+
+from text_pipeline import QUESTION_MARKER, iter_question_blocks
+
+
+def whole_text_blocks(texts, marker=QUESTION_MARKER):
+    """Reference split of the joined text, as iter_question_blocks must produce"""
+    text = ''.join(page + '\n' for page in texts)
+    matches = list(marker.finditer(text))
+    return [
+        (int(next(group for group in match.groups() if group)),
+         text[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(text)])
+        for i, match in enumerate(matches)
+    ]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_whole_text_split(seed):
+    rng = random.Random(seed)
+    words = ['Question', 'QUESTION:', 'Question: ', 'A.', 'answer', '12', '3', ' ', 'text']
+    texts = [''.join(rng.choice(words) for _ in range(rng.randrange(0, 30))) for _ in range(rng.randrange(1, 12))]
+    assert list(iter_question_blocks(texts)) == whole_text_blocks(texts)
+
+
+def test_marker_cut_off_at_page_end():
+    texts = ['intro QUESTION:', '7 What is Azure?', 'more of it Question', '8 Next']
+    assert list(iter_question_blocks(texts)) == [(7, ' What is Azure?\nmore of it '), (8, ' Next\n')]
+
+
+def test_long_block_is_linear():
+    texts = ['Question 1'] + ['x' * 1000] * 20000
+    start = time.perf_counter()
+    (number, block), = iter_question_blocks(texts)
+    assert number == 1 and len(block) == 20000 * 1001 + 1
+    assert time.perf_counter() - start < 2